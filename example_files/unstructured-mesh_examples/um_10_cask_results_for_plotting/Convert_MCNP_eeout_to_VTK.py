@@ -30,97 +30,378 @@
 # DISCLOSED, OR REPRESENTS THAT ITS USE WOULD NOT INFRINGE PRIVATELY OWNED
 # RIGHTS.
 
+import argparse
+import base64
+import concurrent.futures
+import hashlib
+import itertools
 import os
 import re
+import shutil
 import sys
-
-# Find the start and end positions for the first matching sublist in a list.
-def find_sublist( sl, l ):
-    sll=len( sl )
-    for ind in ( i for i,e in enumerate( l ) if e == sl[ 0 ] ):
-        if( l[ ind:ind+sll ] == sl ):
-            return ind,ind+sll-1
-
-# Extract a certain number of entries (length) following a sublist (sublist) for
-# a given input list (inlist).
-def extract_sublist_entries( sublist, length, inlist ):
-    lp1 = find_sublist( sublist, inlist )[ 1 ] + 1
-    lp2 = lp1 + length
-    return inlist[ lp1:lp2 ]
+import tempfile
+import warnings
+import zlib
+
+import numpy as np
+
+# EEOUT element type: ( nodes per element, VTK cell type, connectivity section ).
+ELEMENT_TYPES = {
+    4:  ( 4,  10, 'CONNECTIVITY DATA 1ST ORDER TETS ELEMENT ORDERED' ),
+    5:  ( 6,  13, 'CONNECTIVITY DATA 1ST ORDER PENTS ELEMENT ORDERED' ),
+    6:  ( 8,  12, 'CONNECTIVITY DATA 1ST ORDER HEXS ELEMENT ORDERED' ),
+    14: ( 10, 24, 'CONNECTIVITY DATA 2ND ORDER TETS ELEMENT ORDERED' ),
+    15: ( 15, 26, 'CONNECTIVITY DATA 2ND ORDER PENTS ELEMENT ORDERED' ),
+    16: ( 20, 25, 'CONNECTIVITY DATA 2ND ORDER HEXS ELEMENT ORDERED' ),
+}
+
+# Numeric sections decoded into arrays, by title prefix, with their dtypes.
+# Anything else (centroids, nearest neighbors, RESULT SQR sets, ...) is
+# skipped without being decoded.
+GEOMETRY_SECTIONS = (
+    ( 'NODES X',           np.float64 ),
+    ( 'NODES Y',           np.float64 ),
+    ( 'NODES Z',           np.float64 ),
+    ( 'ELEMENT TYPE',      np.int8 ),
+    ( 'ELEMENT MATERIAL',  np.int32 ),
+    ( 'CONNECTIVITY DATA', np.int32 ),
+    ( 'DENSITY',           np.float64 ),
+    ( 'VOLUMES',           np.float64 ),
+)
+
+# Lines decoded at a time; bounds the text held in memory for a section.
+BLOCK_LINES = 65536
+
+# Bumped whenever the cached mesh arrays change meaning.
+GEOMETRY_CACHE_VERSION = 1
+
+# Insert the "E" that Fortran omits from three-digit exponents (1.234-105)
+# with bulk byte replacements: protect exponent and leading signs, mark the
+# remaining signs as exponents, then restore the protected signs.
+def fix_fortran_exponents( data ):
+    data = b' ' + data
+    for e in ( b'E', b'e' ):
+        data = data.replace( e + b'-', e + b'~' ).replace( e + b'+', e )
+    for sep in ( b' ', b'\n', b'\t' ):
+        data = data.replace( sep + b'-', sep + b'~' ).replace( sep + b'+', sep )
+    data = data.replace( b'-', b'E-' ).replace( b'+', b'E+' )
+    return data.replace( b'~', b'-' )
+
+# Bulk-convert whitespace-separated numbers to float64, repairing Fortran
+# exponents written without an "E" if needed.
+def decode_floats( data ):
+    with warnings.catch_warnings():
+        warnings.simplefilter( 'error', DeprecationWarning )
+        try:
+            return np.fromstring( data, dtype=np.float64, sep=' ' )
+        except( DeprecationWarning, ValueError ):
+            pass
+    return np.fromstring( fix_fortran_exponents( data ), dtype=np.float64, sep=' ' )
+
+# One EEOUT section: a six-integer descriptor (title length, records, data
+# type, byte width, values per record, values per line), an optional title
+# line, and the data lines.  The data are read on demand; whatever is not
+# read is skipped when the next section is requested.
+class EeoutSection:
+
+    def __init__( self, f, descriptor, title ):
+        self.f = f
+        self.offset = f.tell()
+        self.descriptor = descriptor
+        self.title = title
+        title_length, records, data_type, width, count, per_line = descriptor
+        self.records = records
+        self.count = count
+        self.data_type = data_type
+        if( records == 0 ):
+            self.remaining = 0
+        elif( data_type == 1 ):
+            # Character data: one line per record.
+            self.remaining = records
+        else:
+            self.remaining = records * -( -count // max( per_line, 1 ) )
+
+    # Read the remaining data lines as text.
+    def lines( self ):
+        lines = [ l.decode( 'ascii', 'replace' ).rstrip() for l in
+                  itertools.islice( self.f, self.remaining ) ]
+        self.remaining = 0
+        return lines
+
+    # Read the remaining data lines a block at a time, feeding the raw text to
+    # digest (a hashlib object) if given.
+    def blocks( self, digest = None ):
+        while( self.remaining > 0 ):
+            block = list( itertools.islice( self.f, min( self.remaining, BLOCK_LINES ) ) )
+            if( not block ):
+                raise ValueError( 'EEOUT file ends inside section "{:}"'.format( self.title ) )
+            self.remaining -= len( block )
+            block = b''.join( block )
+            if( digest is not None ):
+                digest.update( block )
+            yield block
+
+    # Decode the data lines block by block into a preallocated array.
+    def values( self, dtype, digest = None ):
+        n = self.records * self.count
+        out = np.empty( n, dtype=dtype )
+        filled = 0
+        for block in self.blocks( digest ):
+            decoded = decode_floats( block )
+            if( filled + decoded.size > n ):
+                raise ValueError( 'Too many values in section "{:}"'.format( self.title ) )
+            out[ filled:filled + decoded.size ] = decoded
+            filled += decoded.size
+        if( filled != n ):
+            raise ValueError( 'Expected {:} values in section "{:}", found {:}'.format(
+                n, self.title, filled ) )
+        return out
+
+    def skip( self ):
+        for _ in itertools.islice( self.f, self.remaining ):
+            pass
+        self.remaining = 0
+
+# Iterate over the sections of an ASCII EEOUT file opened in binary mode.
+def iter_eeout_sections( f ):
+    first = f.readline()
+    if( not first.startswith( b'MCNP EDITS' ) ):
+        raise ValueError( 'Not an MCNP EEOUT file' )
+    if( first.split()[ -1:] != [ b'A' ] ):
+        raise ValueError( 'Only ASCII EEOUT files are supported; convert binary files '
+                          'with "um_post_op -bc" first' )
+
+    for line in f:
+        fields = line.split()
+        if( not fields ):
+            continue
+        if( len( fields ) != 6 or not all( x.isdigit() for x in fields ) ):
+            raise ValueError( 'Unexpected line in EEOUT file: {:}'.format(
+                line.decode( 'ascii', 'replace' ).strip() ) )
+        descriptor = [ int( x ) for x in fields ]
+        title = ''
+        if( descriptor[ 0 ] > 0 ):
+            title = f.readline().decode( 'ascii', 'replace' ).strip()
+        section = EeoutSection( f, descriptor, title )
+        yield section
+        section.skip()
+
+# Decode the numeric data of the section starting at a byte offset.
+def read_section_values( infilename, offset, descriptor, title, dtype = np.float64 ):
+    with open( infilename, 'rb' ) as f:
+        f.seek( offset )
+        return EeoutSection( f, descriptor, title ).values( dtype )
+
+# Read an EEOUT file in one pass.  Returns a dictionary with the header
+# counts ('NUMBER OF NODES', ...), the header text, the typed geometry arrays
+# (keyed by section title), a hash of the raw geometry sections, and the
+# edits as a list of [ edit line, [ [ data set title, float64 values ], ... ] ].
+# With an edit_pool (concurrent.futures executor) the edit data sets are
+# decoded by the pool while the pass continues.  With defer_geometry the
+# geometry sections are only hashed; their locations are returned under
+# 'geometry_sections' for read_section_values.
+def read_eeout( infilename, edit_pool = None, defer_geometry = False ):
+    eeout = { 'counts': {}, 'header_text': [], 'geometry': {}, 'geometry_sections': {},
+              'edits': [] }
+    digest = hashlib.sha256( str( GEOMETRY_CACHE_VERSION ).encode( 'ascii' ) )
+    in_header = True
+    with open( infilename, 'rb' ) as f:
+        for section in iter_eeout_sections( f ):
+            title = section.title
+            if( title.startswith( 'NODES X' ) ):
+                in_header = False
+
+            dtype = next( ( d for prefix, d in GEOMETRY_SECTIONS if title.startswith( prefix ) ), None )
+            if( dtype is not None ):
+                digest.update( '{:} {:}\n'.format( section.descriptor, title ).encode( 'ascii' ) )
+                if( defer_geometry ):
+                    eeout[ 'geometry_sections' ][ title ] = ( section.offset, section.descriptor, dtype )
+                    for block in section.blocks( digest ):
+                        pass
+                else:
+                    eeout[ 'geometry' ][ title ] = section.values( dtype, digest )
+
+            elif( title.startswith( 'DATA OUTPUT PARTICLE' ) ):
+                eeout[ 'edits' ].append( [ title, [] ] )
+
+            elif( title.startswith( 'DATA SETS' ) ):
+                if( 'RESULT SQR' in title or not eeout[ 'edits' ] ):
+                    continue
+                if( edit_pool is not None ):
+                    values = edit_pool.submit( read_section_values, infilename,
+                                               section.offset, section.descriptor, title )
+                else:
+                    values = section.values( np.float64 )
+                eeout[ 'edits' ][ -1 ][ 1 ].append( [ title, values ] )
+
+            elif( in_header ):
+                lines = section.lines()
+                eeout[ 'header_text' ] += ( [ title ] if title else [] ) + lines
+                for l in lines:
+                    m = re.match( r'\s*(NUMBER OF [^:]*?)\s*:\s*(\S+)', l )
+                    if( m ):
+                        eeout[ 'counts' ][ m.group( 1 ) ] = int( m.group( 2 ) )
+
+    eeout[ 'geometry_hash' ] = digest.hexdigest()
+
+    for e, edit_sets in eeout[ 'edits' ]:
+        for edit_set in edit_sets:
+            if( isinstance( edit_set[ 1 ], concurrent.futures.Future ) ):
+                edit_set[ 1 ] = edit_set[ 1 ].result()
+    return eeout
 
 # Calculate the connected nodes for various element types.
 def calculate_connectivity_list_length( e_types ):
-    connectivity_list_length = []
-    for e in e_types:
-        if( e == '4' ):
-            connectivity_list_length.append( 4 )
-        elif( e == '5' ):
-            connectivity_list_length.append( 6 )
-        elif( e == '6' ):
-            connectivity_list_length.append( 8 )
-        elif( e == '14' ):
-            connectivity_list_length.append( 10 )
-        elif( e == '15' ):
-            connectivity_list_length.append( 15 )
-        elif( e == '16' ):
-            connectivity_list_length.append( 20 )
-    return connectivity_list_length
+    lengths = np.zeros( 256, dtype=np.int32 )
+    for e, ( n, vtk_type, name ) in ELEMENT_TYPES.items():
+        lengths[ e ] = n
+    return lengths[ np.asarray( e_types ).astype( np.uint8 ) ]
 
 # Convert eeout element types to VTK element types.
 def calculate_vtk_e_types( e_types ):
-    vtk_e_types = []
-    for e in e_types:
-        if( e == '4'):
-            vtk_e_types.append( '10' )
-        elif( e == '5' ):
-            vtk_e_types.append( '13' )
-        elif( e == '6' ):
-            vtk_e_types.append( '12' )
-        elif( e == '14' ):
-            vtk_e_types.append( '24' )
-        elif( e == '15' ):
-            vtk_e_types.append( '26' )
-        elif( e == '16' ):
-            vtk_e_types.append( '25' )
-    return vtk_e_types
-
-# Create flat list of 3D vertices from individual coordinate lists.
+    vtk_types = np.zeros( 256, dtype=np.uint8 )
+    for e, ( n, vtk_type, name ) in ELEMENT_TYPES.items():
+        vtk_types[ e ] = vtk_type
+    return vtk_types[ np.asarray( e_types ).astype( np.uint8 ) ]
+
+# Create flat array of 3D vertices from individual coordinate arrays.
 def create_vertices( xs, ys, zs ):
-    v = []
-    for n,x in enumerate( xs ):
-        v.append( xs[ n ] )
-        v.append( ys[ n ] )
-        v.append( zs[ n ] )
-    return(v)
-
-# Reformat list to print its elements nicely within the XML file.
-def pretty_print_list( indent, cols, colwidths, inlist ):
-    pretty_list_string = indent * ' '
-    for n,i in enumerate( inlist ):
-        pretty_list_string += str( i ).rjust( colwidths ) + ' '
-        if( n % cols == cols - 1 ):
-            pretty_list_string += '\n' + indent * ' '
-    pretty_list_string += '\n'
-    return pretty_list_string
-
-# Perform various sanity checks on edit results.
+    return np.column_stack( ( xs, ys, zs ) ).ravel()
+
+# Format values as text lines of cols entries, each right-justified to
+# colwidths with the given %-conversion (e.g. '.5E', 'd'), for the XML file.
+# Yields the text a block of rows at a time.
+def pretty_print_list( indent, cols, colwidths, inlist, conversion = 's', block_rows = 4096 ):
+    pad = indent * ' '
+    spec = '%' + str( colwidths ) + conversion + ' '
+    inlist = inlist.tolist() if isinstance( inlist, np.ndarray ) else list( inlist )
+    n = len( inlist )
+    block = cols * block_rows
+    for start in range( 0, n - n % cols, block ):
+        values = inlist[ start:min( start + block, n - n % cols ) ]
+        yield ( ( pad + spec * cols + '\n' ) * ( len( values ) // cols ) ) % tuple( values )
+    if( n % cols ):
+        yield pad + ( spec * ( n % cols ) ) % tuple( inlist[ n - n % cols: ] ) + '\n'
+    else:
+        yield pad + '\n'
+
+DATA_FORMATS = ( 'ascii', 'binary', 'appended' )
+
+VTK_TYPE_NAMES = {
+    np.dtype( np.int8 ):    'Int8',
+    np.dtype( np.uint8 ):   'UInt8',
+    np.dtype( np.int32 ):   'Int32',
+    np.dtype( np.int64 ):   'Int64',
+    np.dtype( np.float32 ): 'Float32',
+    np.dtype( np.float64 ): 'Float64',
+}
+
+# Write a VTK XML unstructured grid (.vtu) file.  DataArrays are written as
+# ascii text, inline base64 binary, or appended binary (raw bytes or base64)
+# taken directly from the NumPy buffers, optionally zlib-compressed.
+class VtuWriter:
+
+    # Uncompressed bytes per zlib block.
+    BLOCK_BYTES = 1 << 20
+
+    def __init__( self, filename, data_format = 'ascii', compress = False,
+                  encoding = 'raw', level = 6 ):
+        if( data_format not in DATA_FORMATS ):
+            raise ValueError( 'Unknown VTK data format "{:}"'.format( data_format ) )
+        if( encoding not in ( 'raw', 'base64' ) ):
+            raise ValueError( 'Unknown appended data encoding "{:}"'.format( encoding ) )
+        if( compress and data_format == 'ascii' ):
+            raise ValueError( 'Compression requires the binary or appended format' )
+        self.f = open( filename, 'wb' )
+        self.data_format = data_format
+        self.compress = compress
+        self.encoding = encoding if data_format == 'appended' else 'base64'
+        self.level = level
+        self.appended = None
+        self.offset = 0
+
+    def write( self, text ):
+        self.f.write( text.encode( 'ascii' ) )
+
+    def start( self, points, cells ):
+        if( self.data_format == 'ascii' ):
+            self.write( '<VTKFile type="UnstructuredGrid" version="0.1" byte_order="LittleEndian">' + '\n' )
+        else:
+            compressor = ' compressor="vtkZLibDataCompressor"' if self.compress else ''
+            self.write( '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian"'
+                        ' header_type="UInt64"' + compressor + '>' + '\n' )
+        self.write( '  <UnstructuredGrid>' + '\n' )
+        self.write( '    <Piece NumberOfPoints="' + str( points ) + '" NumberOfCells="' + str( cells ) + '">' + '\n' )
+
+    # Encode an array as binary blocks: a UInt64 header followed by the data,
+    # or by the zlib blocks when compressing.
+    def encode( self, values ):
+        data = memoryview( np.ascontiguousarray( values, dtype=values.dtype.newbyteorder( '<' ) ) ).cast( 'B' )
+        if( self.compress ):
+            blocks = [ zlib.compress( data[ i:i + self.BLOCK_BYTES ], self.level )
+                       for i in range( 0, len( data ), self.BLOCK_BYTES ) ]
+            last = len( data ) - ( len( blocks ) - 1 ) * self.BLOCK_BYTES if blocks else 0
+            header = np.array( [ len( blocks ), self.BLOCK_BYTES, last ] + [ len( b ) for b in blocks ],
+                               dtype='<u8' ).tobytes()
+            if( self.encoding == 'base64' ):
+                # Header and compressed data are encoded separately.
+                return [ base64.b64encode( header ), base64.b64encode( b''.join( blocks ) ) ]
+            return [ header ] + blocks
+        header = np.array( [ len( data ) ], dtype='<u8' ).tobytes()
+        if( self.encoding == 'base64' ):
+            return [ base64.b64encode( header + data ) ]
+        return [ header, data ]
+
+    # Write one DataArray.  cols, colwidths and conversion control the ascii
+    # layout only.
+    def data_array( self, name, values, cols, colwidths, conversion, components = None ):
+        values = np.asarray( values )
+        attributes = 'type="' + VTK_TYPE_NAMES[ values.dtype ] + '"'
+        if( name is not None ):
+            attributes += ' Name="' + name + '"'
+        if( components is not None ):
+            attributes += ' NumberOfComponents="' + str( components ) + '"'
+
+        if( self.data_format == 'ascii' ):
+            self.write( '        <DataArray ' + attributes + ' format="ascii">' + '\n' )
+            for text in pretty_print_list( 10, cols, colwidths, values, conversion ):
+                self.write( text )
+            self.write( '        </DataArray>' + '\n' )
+
+        elif( self.data_format == 'binary' ):
+            self.write( '        <DataArray ' + attributes + ' format="binary">' + '\n' + 10 * ' ' )
+            for part in self.encode( values ):
+                self.f.write( part )
+            self.write( '\n' + '        </DataArray>' + '\n' )
+
+        else:
+            self.write( '        <DataArray ' + attributes + ' format="appended" offset="'
+                        + str( self.offset ) + '"/>' + '\n' )
+            # Spool the appended data so arrays need not stay in memory.
+            if( self.appended is None ):
+                self.appended = tempfile.TemporaryFile()
+            for part in self.encode( values ):
+                self.appended.write( part )
+                self.offset += len( part )
+
+    def close( self ):
+        self.write( '    </Piece>' + '\n' )
+        self.write( '  </UnstructuredGrid>' + '\n' )
+        if( self.data_format == 'appended' ):
+            self.write( '  <AppendedData encoding="' + self.encoding + '">' + '\n' + '   _' )
+            if( self.appended is not None ):
+                self.appended.seek( 0 )
+                shutil.copyfileobj( self.appended, self.f, 1 << 24 )
+                self.appended.close()
+                self.appended = None
+            self.write( '\n' + '  </AppendedData>' + '\n' )
+        self.write( '</VTKFile>' + '\n' )
+        self.f.close()
+
+# Perform various sanity checks on edit results.  Returns the edit values
+# without the leading gap entry, with NaNs replaced by 1e308.
 def perform_edit_checks( edit_values, total_elements, check_gap = True ):
-    found_negative = False
-    found_nan = False
-    max_val = -1e308
-    min_nz_val = 1e308
-    min_val = 1e308
-
-    # Custom float conversion for Fortran-formatted numbers missing an "e" and
-    # with three digits in the exponent.
-    def floatf( x ):
-        try:
-            rv = float( x )
-        except:
-            rv = float( x[0:-4] + 'e' + x[-4:] )
-        return rv
-
-    edit_values = [ floatf(i) for i in edit_values ]
+    edit_values = np.asarray( edit_values, dtype=np.float64 )
 
     if( len( edit_values ) == total_elements + 1 ):
         gap_value = edit_values[ 0 ]
@@ -132,178 +413,204 @@ def perform_edit_checks( edit_values, total_elements, check_gap = True ):
 
     # The first edit entry is for gaps --- discard for plotting.
     edit_values = edit_values[ 1: ]
-    for ev in edit_values:
-        if( ev < 0 and found_negative == False ):
-            print( 'WARNING: Negative edit entry found.' )
-            found_negative = True
-        if( ev != ev and found_nan == False ):
-            print( 'WARNING: NaN edit entry found.  Setting to 1e308.' )
-            found_nan = True
-        if( ev < min_nz_val and ev > 0.0 ): min_nz_val = ev
-        if( ev < min_val ): min_val = ev
-        if( ev > max_val ): max_val = ev
-
-    if( found_nan == True ):
-        edit_values = [ 1e308 if ev != ev else ev for ev in edit_values  ]
+    nan_mask = np.isnan( edit_values )
+    found_nan = bool( nan_mask.any() )
+    finite = edit_values[ ~nan_mask ] if found_nan else edit_values
+
+    if( np.any( finite < 0 ) ):
+        print( 'WARNING: Negative edit entry found.' )
+    if( found_nan ):
+        print( 'WARNING: NaN edit entry found.  Setting to 1e308.' )
+        edit_values = np.where( nan_mask, 1e308, edit_values )
+
+    positive = finite[ finite > 0.0 ]
+    max_val    = finite.max() if finite.size else -1e308
+    min_nz_val = positive.min() if positive.size else 1e308
+    min_val    = finite.min() if finite.size else 1e308
 
     print( '    Maximum          value: {:.5e}'.format( max_val ) )
     print( '    Minimum positive value: {:.5e}'.format( min_nz_val ) )
     print( '    Minimum          value: {:.5e}'.format( min_val ) )
 
-    edit_values = [ '{:.5e}'.format( i ) for i in edit_values ]
-
     return edit_values
 
-# Separate into list and parse into results and relative uncertainties, if
+# Parse the data sets of one edit into results and relative uncertainties, if
 # appropriate.
-def get_results( edit_values, edit_number, total_elements ):
+def get_results( edit_sets, edit_number, total_elements ):
     edit_results = []
-    tmp = edit_values.split('DATA SETS')[1:]
-    edit_sets = [tmp[i] for i in range(len(tmp)) if 'RESULT SQR TIME BIN' not in tmp[i]]
-    sublists = [ ['RESULT', 'TIME'] if 'RESULT TIME' in edit_sets[i] else ['REL', 'ERROR', 'TIME'] for i in range(len(edit_sets))]
-    count = -1
-    for s in sublists:
-        count += 1
-        edit_data = extract_sublist_entries( s, total_elements + 1 + 26, edit_sets[count].split() )
+    for title, edit_data in edit_sets:
+        kind = 'RESULT' if title.startswith( 'DATA SETS RESULT TIME' ) else 'ERROR'
+
         # Get supplemental edit-identifying information.
-        time_bin   = edit_data[2]
-        time_value = edit_data[7]
-        erg_bin    = edit_data[16]
-        erg_value  = edit_data[21]
+        time_bin,  time_value = re.search( r'TIME BIN : (\S+) ; TIME VALUE : (\S+)', title ).groups()
+        erg_bin,   erg_value  = re.search( r'ENERGY BIN : (\S+) ; ENERGY VALUE : (\S+)', title ).groups()
 
         # Construct unique name.
         edit_name = 'EDIT_{:}_{:}_TIME_BIN_{:}_MAX_TIME_{:}_ENERGY_BIN_{:}_MAX_ENERGY_{:}'.format( \
-            edit_number, s[-2], time_bin, time_value, erg_bin, erg_value )
+            edit_number, kind, time_bin, time_value, erg_bin, erg_value )
 
-        # Extract only edit data values and validate.
-        edit_data = edit_data[26:]
+        # Validate edit data values.
         print( '    Processing & Validating {:}...'.format( edit_name ) )
-        check_gap = (not 'ERROR' in s ) # Don't check gap for error arrays.
+        check_gap = ( kind != 'ERROR' ) # Don't check gap for error arrays.
         edit_data = perform_edit_checks( edit_data, total_elements, check_gap )
         edit_results.append( [ edit_name, edit_data ] )
 
     return edit_results
 
-################################################################################
+# Assemble the VTK mesh arrays from the decoded EEOUT geometry sections.
+def build_mesh( counts, geometry ):
+    mesh = {}
 
-import __main__ as main
-if(__name__ == '__main__' and hasattr(main, '__file__')):
+    # Determine number of nodes and cells.
+    mesh[ 'nodes' ] = counts[ 'NUMBER OF NODES' ]
+    mesh[ 'total_elements' ] = sum( counts.get( 'NUMBER OF {:} {:}'.format( o, t ), 0 )
+        for o in ( '1st', '2nd' ) for t in ( 'TETS', 'PENTS', 'HEXS' ) )
 
-    # Validate command line arguments.
-    if( len( sys.argv ) != 2 ):
-        print( 'ERROR: Incorrect number of command line arguments provided ('
-            + str( len( sys.argv ) ) + '); those provided:' )
-        print( sys.argv )
-        exit()
+    x_coords    = geometry[ 'NODES X (cm)' ]
+    y_coords    = geometry[ 'NODES Y (cm)' ]
+    z_coords    = geometry[ 'NODES Z (cm)' ]
+    e_types     = geometry[ 'ELEMENT TYPE' ]
 
-    if( not os.path.isfile( sys.argv[ 1 ] ) ):
-        print( 'ERROR: MCNP EEOUT file not found.' )
-        exit()
+    # Process connectivity list (element blocks in EEOUT type order).
+    connectivity_list_elements = calculate_connectivity_list_length( e_types )
+    connectivities = [ geometry[ name ] for e, ( n, vtk_type, name ) in ELEMENT_TYPES.items()
+                       if np.any( e_types == e ) ]
+    connectivities = np.concatenate( connectivities ) if connectivities else np.zeros( 0, np.int32 )
 
-    infilename = sys.argv[1]
+    # Create array of vertices from individual coordinate arrays.
+    mesh[ 'vertices' ] = create_vertices( x_coords, y_coords, z_coords )
 
-    print( 'Processing {:}...'.format( infilename ) )
+    # Subtract one from all vertex IDs in the connectivity list (to make
+    # zero-indexed).
+    connectivities = connectivities - 1
 
-    with open ( infilename, 'r' ) as myfile:
-        eeout = myfile.read()
+    # Accumulate offset list.
+    offsets = np.cumsum( connectivity_list_elements )
 
-    # Determine number of nodes and cells.
-    nodes  = int( re.search( r'NUMBER OF NODES\s*:\s+(\d+)',     eeout ).group( 1 ) )
-    tets1  = int( re.search( r'NUMBER OF 1st TETS\s*:\s+(\d+)',  eeout ).group( 1 ) )
-    pents1 = int( re.search( r'NUMBER OF 1st PENTS\s*:\s+(\d+)', eeout ).group( 1 ) )
-    hexs1  = int( re.search( r'NUMBER OF 1st HEXS\s*:\s+(\d+)',  eeout ).group( 1 ) )
-    tets2  = int( re.search( r'NUMBER OF 2nd TETS\s*:\s+(\d+)',  eeout ).group( 1 ) )
-    pents2 = int( re.search( r'NUMBER OF 2nd PENTS\s*:\s+(\d+)', eeout ).group( 1 ) )
-    hexs2  = int( re.search( r'NUMBER OF 2nd HEXS\s*:\s+(\d+)',  eeout ).group( 1 ) )
-    total_elements = tets1 + pents1 + hexs1 + tets2 + pents2 + hexs2
+    # Use 32-bit cell indices unless the mesh is too large for them.
+    index_dtype = np.int32 if( offsets.size == 0 or offsets[ -1 ] < 2**31 ) else np.int64
+    connectivities = connectivities.astype( index_dtype )
+    offsets = offsets.astype( index_dtype )
 
-    # Retrieve edit information.
-    edit_list = re.findall( r'(DATA OUTPUT PARTICLE.*?)\n', eeout, re.S )
+    # Convert eeout element types to VTK element types.
+    mesh[ 'vtk_e_types' ] = calculate_vtk_e_types( e_types )
+
+    mesh[ 'connectivities' ] = connectivities
+    mesh[ 'offsets' ] = offsets
+    mesh[ 'materials' ] = geometry[ 'ELEMENT MATERIAL' ]
+    mesh[ 'densities' ] = geometry[ 'DENSITY (gm/cm^3)' ]
+    mesh[ 'volumes' ]   = geometry[ 'VOLUMES (cm^3)' ]
+    return mesh
+
+# Assemble the mesh for a read EEOUT file, from the geometry cache in
+# cache_dir when it holds the same geometry.  Geometry sections deferred by
+# read_eeout are decoded only on a cache miss; new meshes are added to the
+# cache as <geometry hash>.npz.
+def load_mesh( infilename, eeout, cache_dir = None ):
+    cache_file = None
+    if( cache_dir is not None ):
+        cache_file = os.path.join( cache_dir, eeout[ 'geometry_hash' ] + '.npz' )
+        try:
+            with np.load( cache_file ) as cached:
+                mesh = { k: cached[ k ] for k in cached.files }
+            mesh[ 'nodes' ] = int( mesh[ 'nodes' ] )
+            mesh[ 'total_elements' ] = int( mesh[ 'total_elements' ] )
+            print( '  Using cached geometry {:}'.format( cache_file ) )
+            return mesh
+        except( OSError, ValueError, KeyError ):
+            pass
+
+    geometry = dict( eeout[ 'geometry' ] )
+    for title, ( offset, descriptor, dtype ) in eeout[ 'geometry_sections' ].items():
+        geometry[ title ] = read_section_values( infilename, offset, descriptor, title, dtype )
+    mesh = build_mesh( eeout[ 'counts' ], geometry )
+
+    if( cache_file is not None ):
+        # Write under a temporary name so concurrent conversions never see a
+        # partial file.
+        os.makedirs( cache_dir, exist_ok=True )
+        partial = '{:}.{:}.partial.npz'.format( cache_file[ :-4 ], os.getpid() )
+        np.savez( partial, **mesh )
+        os.replace( partial, cache_file )
+    return mesh
+
+# Read an EEOUT file and its mesh.  With workers > 1 the edit data sets are
+# decoded in that many processes.  With build_mesh False the geometry is only
+# hashed, not decoded, and mesh is None.  Returns ( eeout, mesh ).
+def load_eeout( infilename, workers = 1, cache_dir = None, build_mesh = True ):
 
-    print( '  Found {:} edit(s).'.format( len( edit_list ) ) )
+    print( 'Processing {:}...'.format( infilename ) )
 
-    # Capture edit data for use later.
-    eeout_edits = re.search( r'(DATA OUTPUT.*?)CENTROIDS', eeout, re.S ).group( 1 )
+    # Read all sections in one streaming pass.
+    defer_geometry = cache_dir is not None or not build_mesh
+    if( workers > 1 ):
+        with concurrent.futures.ProcessPoolExecutor( workers ) as pool:
+            eeout = read_eeout( infilename, pool, defer_geometry )
+    else:
+        eeout = read_eeout( infilename, None, defer_geometry )
 
-    # Capture header information.
-    eeout_header = re.search( r'(.*?)NODES X', eeout, re.S ).group( 1 )
-    eeout_header = re.sub( r'\s+\n', '\n', eeout_header )
-    eeout_header = re.sub( r'\n+', '\n', eeout_header )
-    eeout_header = re.sub( r'^', '#  ', eeout_header )
-    eeout_header = re.sub( r'\n', '\n#  ', eeout_header )
+    # The geometry is assembled once and shared by all edits.
+    mesh = load_mesh( infilename, eeout, cache_dir ) if build_mesh else None
 
-    # Reformat eeout to list to permit easy reading of list data.
-    eeout = eeout.replace( '\n', '' )
-    eeout = eeout.split( ' ' )
-    eeout = list( filter( None, eeout ) )
+    print( '  Found {:} edit(s).'.format( len( eeout[ 'edits' ] ) ) )
+    return eeout, mesh
 
-    # Remove head of file to make matching easier.
-    eeout = eeout[ find_sublist( [ 'NODES', 'X', '(cm)' ], eeout )[ 0 ]: ]
+# Validate all edits of an EEOUT file before any is written, so a bad edit
+# leaves no partial output.  Returns a list of [ name, values ].
+def validate_edits( edit_list, total_elements ):
+    edit_results = []
 
-    # Find the list positions for the first and last nodes.
-    x_coords    = extract_sublist_entries( ['NODES', 'X', '(cm)'], nodes, eeout )
-    y_coords    = extract_sublist_entries( ['NODES', 'Y', '(cm)'], nodes, eeout )
-    z_coords    = extract_sublist_entries( ['NODES', 'Z', '(cm)'], nodes, eeout )
-    e_types     = extract_sublist_entries( ['ELEMENT', 'TYPE'], total_elements, eeout )
-    e_materials = extract_sublist_entries( ['ELEMENT', 'MATERIAL'], total_elements, eeout )
+    # Edits may have corresponding relative uncertainties.  Edits may be
+    # binned by energy and/or time.
+    for e, edit_sets in edit_list:
+        particle_type = re.search( r'PARTICLE : (\d+)', e ).group( 1 )
+        edit_type = re.search( r'TYPE : (.*?)$', e ).group( 1 )
+        edit_number = re.search( r'TYPE : .*?_(\d+)$', e ).group( 1 )
+        print( '  Processing {:} edit...'.format( edit_type ) )
+        edit_results += get_results( edit_sets, edit_number, total_elements )
+    return edit_results
 
-    # Process connectivity list.
-    connectivity_list_elements = calculate_connectivity_list_length( e_types )
-    connectivities = []
-    if( '4' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '1ST', 'ORDER', 'TETS', 'ELEMENT', 'ORDERED' ],
-            4 * e_types.count( '4' ), eeout )
-    if( '5' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '1ST', 'ORDER', 'PENTS', 'ELEMENT', 'ORDERED' ],
-            6 * e_types.count( '5' ), eeout )
-    if( '6' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '1ST', 'ORDER', 'HEXS', 'ELEMENT', 'ORDERED' ],
-            8 * e_types.count( '6' ), eeout )
-    if( '14' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '2ND', 'ORDER', 'TETS', 'ELEMENT', 'ORDERED' ],
-            10 * e_types.count( '14' ), eeout )
-    if( '15' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '2ND', 'ORDER', 'PENTS', 'ELEMENT', 'ORDERED' ],
-            15 * e_types.count( '15' ), eeout )
-    if( '16' in e_types ):
-        connectivities += extract_sublist_entries(
-            [ 'CONNECTIVITY', 'DATA', '2ND', 'ORDER', 'HEXS', 'ELEMENT', 'ORDERED' ],
-            20 * e_types.count( '16' ), eeout )
-
-    densities = extract_sublist_entries(
-        [ 'DENSITY', '(gm/cm^3)' ],
-        total_elements, eeout )
-
-    volumes = extract_sublist_entries(
-        [ 'VOLUMES', '(cm^3)' ],
-        total_elements, eeout )
-
-    # Create list of vertices from individual coordinate lists.
-    vertices = create_vertices( x_coords, y_coords, z_coords )
+# Write validated edits as cell data, with names optionally prefixed.
+def write_edits( f, edit_results, prefix = '' ):
+    for er in edit_results:
+        f.data_array( prefix + er[0], er[1], 5, 13, '.5e' )
 
-    # Subtract one from all vertex IDs in the connectivity list (to make
-    # zero-indexed).
-    connectivities = [ str( int( x ) - 1 ) for x in connectivities ]
+# Write the mesh around its cell data: the piece header and material,
+# density, and volume arrays first, then (after the edits) the points and
+# cells.
+def write_mesh_start( f, mesh ):
+    f.start( mesh[ 'nodes' ], mesh[ 'total_elements' ] )
+    f.write( '      <CellData Scalars="scalars">' + '\n' )
+    f.data_array( 'material', mesh[ 'materials' ], 10, 5, 'd' )
+    f.data_array( 'density', mesh[ 'densities' ], 5, 13, '.5E' )
+    f.data_array( 'volume', mesh[ 'volumes' ], 5, 13, '.5E' )
+
+def write_mesh_end( f, mesh ):
+    f.write( '      </CellData>' + '\n' )
+    f.write( '      <Points>' + '\n' )
+    f.data_array( None, mesh[ 'vertices' ], 3, 13, '.5E', components=3 )
+    f.write( '      </Points>' + '\n' )
+    f.write( '      <Cells>' + '\n' )
+    f.data_array( 'connectivity', mesh[ 'connectivities' ], 8, 5, 'd' )
+    f.data_array( 'offsets', mesh[ 'offsets' ], 10, 5, 'd' )
+    f.data_array( 'types', mesh[ 'vtk_e_types' ], 20, 2, 'd' )
+    f.write( '      </Cells>' + '\n' )
+    f.close()
 
-    # Accumulate offset list. Reproduce np.cumsum to avoid NumPy dependency.
-    def cumsum( inlist ):
-        cumlist = [ 0 ]
-        for n,i in enumerate( inlist ):
-            cumlist.append( cumlist[n] + inlist[n] )
-        return cumlist[1:]
-    offsets = cumsum( connectivity_list_elements )
-    offsets = [ str( x ) for x in offsets ]
+# Convert one EEOUT file to <infilename>.vtu.  Returns the output file name.
+def convert_eeout( infilename, data_format = 'ascii', compress = False,
+                   encoding = 'raw', workers = 1, cache_dir = None ):
+    eeout, mesh = load_eeout( infilename, workers, cache_dir )
+    edit_results = validate_edits( eeout[ 'edits' ], mesh[ 'total_elements' ] )
 
-    # Convert eeout element types to VTK element types.
-    vtk_e_types = calculate_vtk_e_types( e_types )
+    # Capture header information.
+    eeout_header = '\n'.join( l for l in eeout[ 'header_text' ] if l.strip() )
+    eeout_header = re.sub( r'^', '#  ', eeout_header )
+    eeout_header = re.sub( r'\n', '\n#  ', eeout_header )
 
     # Open up output vtu (unstructured mesh VTK) file.
-    f = open( infilename + '.vtu', 'w' )
+    outfilename = infilename + '.vtu'
+    f = VtuWriter( outfilename, data_format, compress, encoding )
 
     # Write header comments (but a long header does not work), default: off.
     if( False ):
@@ -316,55 +623,135 @@ if(__name__ == '__main__' and hasattr(main, '__file__')):
         f.write( 80 * '#' + '\n' )
         f.write( '-->' + '\n' )
 
-    f.write( '<VTKFile type="UnstructuredGrid" version="0.1" byte_order="LittleEndian">' + '\n' )
-    f.write( '  <UnstructuredGrid>' + '\n' )
-    f.write( '    <Piece NumberOfPoints="' + str( nodes ) + '" NumberOfCells="' + str( total_elements ) + '">' + '\n' )
-    f.write( '      <CellData Scalars="scalars">' + '\n' )
-    f.write( '        <DataArray type="Int32" Name="material" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 10, 5, e_materials ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '        <DataArray type="Float64" Name="density" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 5, 13, densities ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '        <DataArray type="Float64" Name="volume" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 5, 13, volumes ) )
-    f.write( '        </DataArray>' + '\n' )
-
-    # Output edit information.  Edits may have corresponding relative
-    # uncertainties.  Edits may be binned by energy and/or time.
-    if( len( edit_list ) > 0 ):
-        for e in edit_list:
-            particle_type = re.search( r'PARTICLE : (\d+)', e ).group( 1 )
-            edit_type = re.search( r'TYPE : (.*?)$', e ).group( 1 )
-            edit_number = re.search( r'TYPE : .*?_(\d+)$', e ).group( 1 )
-            print( '  Processing {:} edit...'.format( edit_type ) )
-            myregex = '({:}.*?)(:?DATA OUTPUT PARTICLE|$)'.format( e )
-            edit_data = re.search( myregex, eeout_edits, re.S ).group( 1 )
-            edit_results = get_results( edit_data, edit_number, total_elements )
-            for er in edit_results:
-                f.write( '        <DataArray type="Float64" Name="' + er[0]+ '" format="ascii">' + '\n' )
-                f.write( pretty_print_list( 10, 5, 13, er[1] ) )
-                f.write( '        </DataArray>' + '\n' )
+    write_mesh_start( f, mesh )
+    write_edits( f, edit_results )
+    write_mesh_end( f, mesh )
+    return outfilename
 
-    f.write( '      </CellData>' + '\n' )
-    f.write( '      <Points>' + '\n' )
-    f.write( '        <DataArray type="Float64" NumberOfComponents="3" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 3, 13, vertices ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '      </Points>' + '\n' )
-    f.write( '      <Cells>' + '\n' )
-    f.write( '        <DataArray type="Int32" Name="connectivity" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 8, 5, connectivities ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '        <DataArray type="Int32" Name="offsets" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 10, 5, offsets ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '        <DataArray type="UInt8" Name="types" format="ascii">' + '\n' )
-    f.write( pretty_print_list( 10, 20, 2, vtk_e_types ) )
-    f.write( '        </DataArray>' + '\n' )
-    f.write( '      </Cells>' + '\n' )
-    f.write( '    </Piece>' + '\n' )
-    f.write( '  </UnstructuredGrid>' + '\n' )
-    f.write( '</VTKFile>' + '\n' )
+# Report a file whose conversion failed; checks that exit() have already
+# printed their own message.
+def report_failure( infilename, e ):
+    if( isinstance( e, SystemExit ) ):
+        print( 'ERROR: {:}: conversion stopped'.format( infilename ) )
+    else:
+        print( 'ERROR: {:}: {:}'.format( infilename, e ) )
+
+# Unique DataArray name prefixes for a series: the file name up to its first
+# '.', or, where that collides, the relative path with separators and dots
+# replaced by '_', and finally the file's position in the series.
+def series_prefixes( infilenames ):
+    prefixes = [ os.path.basename( f ).split( '.' )[ 0 ] for f in infilenames ]
+    if( len( set( prefixes ) ) < len( prefixes ) ):
+        collided = { p for p in prefixes if prefixes.count( p ) > 1 }
+        prefixes = [ re.sub( r'[\\/.:]+', '_', os.path.relpath( f ) ).strip( '_' ) if p in collided else p
+                     for f, p in zip( infilenames, prefixes ) ]
+    if( len( set( prefixes ) ) < len( prefixes ) ):
+        prefixes = [ '{:}_{:}'.format( i + 1, p ) for i, p in enumerate( prefixes ) ]
+    return [ p + '_' for p in prefixes ]
+
+# Combine EEOUT files that share one mesh into a single .vtu holding the
+# geometry once and the edits of every file, prefixed with the file name
+# (e.g. run2_EDIT_6_RESULT_...; see series_prefixes).  Only the first file's
+# geometry is decoded; later files are matched by geometry hash.  Files that
+# fail or whose geometry differs are reported and left out.  Returns the
+# number of files left out.
+def convert_series( infilenames, outfilename, data_format = 'ascii', compress = False,
+                    encoding = 'raw', workers = 1, cache_dir = None ):
+    f = None
+    failed = 0
+    for infilename, prefix in zip( infilenames, series_prefixes( infilenames ) ):
+        try:
+            eeout, mesh = load_eeout( infilename, workers, cache_dir, build_mesh=f is None )
+            if( f is not None and eeout[ 'geometry_hash' ] != geometry_hash ):
+                print( 'ERROR: {:}: geometry differs from {:}; left out of {:}'.format(
+                    infilename, first, outfilename ) )
+                failed += 1
+                continue
+            total_elements = mesh[ 'total_elements' ] if f is None else series_mesh[ 'total_elements' ]
+            edit_results = validate_edits( eeout[ 'edits' ], total_elements )
+        except( Exception, SystemExit ) as e:
+            report_failure( infilename, e )
+            failed += 1
+            continue
+
+        if( f is None ):
+            first, geometry_hash, series_mesh = infilename, eeout[ 'geometry_hash' ], mesh
+            f = VtuWriter( outfilename, data_format, compress, encoding )
+            write_mesh_start( f, series_mesh )
+        write_edits( f, edit_results, prefix )
+
+    if( f is not None ):
+        write_mesh_end( f, series_mesh )
+    return failed
+
+# Convert several EEOUT files, jobs at a time in separate processes.  A
+# single file uses the processes for its edit data sets instead.  Returns the
+# number of files that failed.
+def convert_files( infilenames, data_format = 'ascii', compress = False,
+                   encoding = 'raw', jobs = 1, cache_dir = None ):
+    failed = 0
+    if( len( infilenames ) == 1 or jobs <= 1 ):
+        workers = jobs if len( infilenames ) == 1 else 1
+        for infilename in infilenames:
+            try:
+                convert_eeout( infilename, data_format, compress, encoding, workers, cache_dir )
+            except( Exception, SystemExit ) as e:
+                report_failure( infilename, e )
+                failed += 1
+        return failed
+
+    with concurrent.futures.ProcessPoolExecutor( jobs ) as pool:
+        futures = { pool.submit( convert_eeout, infilename, data_format, compress, encoding,
+                                 1, cache_dir ): infilename for infilename in infilenames }
+        for future in concurrent.futures.as_completed( futures ):
+            try:
+                print( 'Wrote {:}'.format( future.result() ) )
+            except( Exception, SystemExit ) as e:
+                report_failure( futures[ future ], e )
+                failed += 1
+    return failed
 
-    f.close()
+################################################################################
+
+import __main__ as main
+if(__name__ == '__main__' and hasattr(main, '__file__')):
+
+    parser = argparse.ArgumentParser(
+        description='Convert MCNP ASCII EEOUT files to VTK unstructured grids (.vtu)' )
+    parser.add_argument( 'eeout', nargs='+', help='MCNP EEOUT file(s)' )
+    parser.add_argument( '--format', '-f', choices=DATA_FORMATS, default='ascii',
+        help='VTK DataArray format (default: ascii)' )
+    parser.add_argument( '--compress', '-z', action='store_true',
+        help='zlib-compress binary/appended data' )
+    parser.add_argument( '--encoding', '-e', choices=( 'raw', 'base64' ), default='raw',
+        help='Encoding of appended data (default: raw)' )
+    parser.add_argument( '--jobs', '-j', type=int, default=1,
+        help='Processes: convert files in parallel, or decode the edits of a '
+             'single file in parallel (default: 1)' )
+    parser.add_argument( '--cache-dir', '-c',
+        help='Directory caching decoded mesh geometry, keyed by a hash of the '
+             'geometry sections; files with cached geometry only decode their edits' )
+    parser.add_argument( '--series', '-s', metavar='OUT.vtu',
+        help='Write all files into one .vtu that stores the shared geometry '
+             'once, with each file\'s edits prefixed by its name' )
+    args = parser.parse_args()
+
+    if( args.compress and args.format == 'ascii' ):
+        print( 'ERROR: --compress requires --format binary or appended.' )
+        exit()
+
+    infilenames = []
+    for infilename in args.eeout:
+        if( not os.path.isfile( infilename ) ):
+            print( 'ERROR: MCNP EEOUT file not found: {:}'.format( infilename ) )
+        else:
+            infilenames.append( infilename )
+
+    if( args.series ):
+        failed = convert_series( infilenames, args.series, args.format, args.compress,
+                                 args.encoding, args.jobs, args.cache_dir )
+    else:
+        failed = convert_files( infilenames, args.format, args.compress, args.encoding,
+                                args.jobs, args.cache_dir )
+    if( failed or len( infilenames ) < len( args.eeout ) ):
+        sys.exit( 1 )
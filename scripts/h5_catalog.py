@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+HDF5 Structure Catalog
+
+Purpose: Walk an HDF5 file once and cache its structure in a JSON sidecar
+Usage: See --help for command-line interface
+
+Listing a large RUNTPE.H5 visits every object and reads every attribute,
+which is slow on parallel filesystems. H5Catalog records each object's
+path, kind, shape, dtype, chunking and attributes in one pass (optionally
+walking top-level groups in parallel processes) and stores the result in
+<file>.catalog.json, keyed by the file's size and modification time.
+h5_dirtree.py and mcnp_hdf5_inspector.py answer listings and path probes
+from the catalog when one is available.
+
+Example:
+    python h5_catalog.py runtpe.h5
+    python h5_catalog.py runtpe.h5 --refresh --workers 8
+"""
+
+import argparse
+import h5py
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+CATALOG_VERSION = 1
+
+
+def _entry(path: str, obj) -> Dict:
+    """Catalog record for one group or dataset"""
+    entry = {'path': path,
+             'kind': 'dataset' if isinstance(obj, h5py.Dataset) else 'group',
+             'attrs': {name: str(value) for name, value in obj.attrs.items()}}
+    if entry['kind'] == 'dataset':
+        entry['shape'] = list(obj.shape) if obj.shape is not None else None
+        entry['dtype'] = str(obj.dtype)
+        entry['chunks'] = list(obj.chunks) if obj.chunks else None
+    return entry
+
+
+def _walk_group(h5_file: str, group: str) -> List[Dict]:
+    """Catalog a group and everything below it, in visititems order"""
+    with h5py.File(h5_file, 'r') as f:
+        obj = f[group]
+        entries = [_entry(obj.name, obj)]
+        if isinstance(obj, h5py.Group):
+            prefix = obj.name.rstrip('/') + '/'
+            obj.visititems(lambda name, child: entries.append(_entry(prefix + name, child)))
+    return entries
+
+
+class H5Catalog:
+    """
+    Cached structure of an HDF5 file
+
+    Parameters:
+        entries: Catalog records in traversal order, starting with '/'
+        source_size: Size of the catalogued file in bytes
+        source_mtime_ns: Modification time of the catalogued file
+    """
+
+    SUFFIX = '.catalog.json'
+
+    # Catalogs already loaded in this process: path -> (size, mtime, catalog)
+    _loaded: Dict[str, Tuple[int, int, 'H5Catalog']] = {}
+
+    def __init__(self, entries: List[Dict], source_size: int = 0, source_mtime_ns: int = 0):
+        self.entries = entries
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        self._by_path = {entry['path']: entry for entry in entries}
+
+    @classmethod
+    def build(cls, h5_file: str, workers: Optional[int] = None) -> 'H5Catalog':
+        """
+        Walk the file and catalog every object
+
+        Parameters:
+            h5_file: Path to HDF5 file
+            workers: Processes used to walk top-level groups in parallel
+                (None or 1 = serial)
+
+        Returns:
+            New H5Catalog (not persisted)
+        """
+        stat = os.stat(h5_file)
+        with h5py.File(h5_file, 'r') as f:
+            root = _entry('/', f)
+            top = list(f.keys())
+
+        if workers and workers > 1 and len(top) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_walk_group, [h5_file] * len(top),
+                                      ['/' + name for name in top]))
+        else:
+            parts = [_walk_group(h5_file, '/' + name) for name in top]
+
+        entries = [root]
+        for part in parts:
+            entries.extend(part)
+        return cls(entries, stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def sidecar_path(cls, h5_file: str) -> str:
+        return h5_file + cls.SUFFIX
+
+    def save(self, path: str) -> None:
+        """Write the catalog as JSON"""
+        with open(path, 'w') as f:
+            json.dump({'version': CATALOG_VERSION,
+                       'source_size': self.source_size,
+                       'source_mtime_ns': self.source_mtime_ns,
+                       'entries': self.entries}, f, separators=(',', ':'))
+
+    @classmethod
+    def cached(cls, h5_file: str) -> Optional['H5Catalog']:
+        """
+        Catalog from memory or the sidecar, if it matches the file
+
+        Returns:
+            H5Catalog, or None when there is no up-to-date catalog
+        """
+        try:
+            stat = os.stat(h5_file)
+        except OSError:
+            return None
+        key = os.path.abspath(h5_file)
+
+        loaded = cls._loaded.get(key)
+        if loaded and loaded[:2] == (stat.st_size, stat.st_mtime_ns):
+            return loaded[2]
+
+        try:
+            with open(cls.sidecar_path(h5_file)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (data.get('version') != CATALOG_VERSION
+                or data.get('source_size') != stat.st_size
+                or data.get('source_mtime_ns') != stat.st_mtime_ns):
+            return None
+
+        catalog = cls(data['entries'], stat.st_size, stat.st_mtime_ns)
+        cls._loaded[key] = (stat.st_size, stat.st_mtime_ns, catalog)
+        return catalog
+
+    @classmethod
+    def load(cls, h5_file: str, refresh: bool = False, persist: bool = True,
+             workers: Optional[int] = None) -> 'H5Catalog':
+        """
+        Get the catalog for a file, building it when missing or stale
+
+        Parameters:
+            h5_file: Path to HDF5 file
+            refresh: Rebuild even if an up-to-date catalog exists
+            persist: Write a freshly built catalog to the JSON sidecar
+                (silently skipped if the directory is read-only)
+            workers: Processes for a parallel build
+
+        Returns:
+            H5Catalog
+        """
+        catalog = None if refresh else cls.cached(h5_file)
+        if catalog is not None:
+            return catalog
+
+        catalog = cls.build(h5_file, workers)
+        if persist:
+            try:
+                catalog.save(cls.sidecar_path(h5_file))
+            except OSError:
+                pass
+        cls._loaded[os.path.abspath(h5_file)] = (catalog.source_size,
+                                                 catalog.source_mtime_ns, catalog)
+        return catalog
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return '/' + path.strip('/') if path.strip('/') else '/'
+
+    def __contains__(self, path: str) -> bool:
+        return self._normalize(path) in self._by_path
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Catalog record for a path, or None"""
+        return self._by_path.get(self._normalize(path))
+
+    def first_present(self, paths: Iterable[str]) -> Optional[str]:
+        """First of several candidate paths that exists in the file"""
+        return next((p for p in paths if p in self), None)
+
+    def walk(self, group: str = '/') -> Iterator[Tuple[str, Dict]]:
+        """
+        Objects below a group, like h5py visititems
+
+        Yields:
+            (name relative to group, catalog record) in traversal order
+        """
+        group = self._normalize(group)
+        prefix = '/' if group == '/' else group + '/'
+        for entry in self.entries:
+            if entry['path'] != group and entry['path'].startswith(prefix):
+                yield entry['path'][len(prefix):], entry
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(
+        description="Build or refresh the structure catalog of an HDF5 file",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('h5file', help='HDF5 file to catalog')
+    parser.add_argument('--refresh', '-r', action='store_true',
+                        help='Rebuild even if an up-to-date catalog exists')
+    parser.add_argument('--workers', '-j', type=int,
+                        help='Processes for walking top-level groups in parallel')
+
+    args = parser.parse_args()
+
+    try:
+        catalog = H5Catalog.load(args.h5file, refresh=args.refresh, workers=args.workers)
+        n_datasets = sum(entry['kind'] == 'dataset' for entry in catalog.entries)
+        print(f"Catalog of {args.h5file}: {len(catalog) - n_datasets} groups, "
+              f"{n_datasets} datasets")
+        print(f"  Sidecar: {H5Catalog.sidecar_path(args.h5file)}")
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
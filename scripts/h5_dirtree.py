@@ -7,11 +7,14 @@ Source: MCNP6.3.1 Theory & User Manual, Appendix D.8
 Usage: python h5_dirtree.py <h5filename> [--group /path/to/group]
 
 This script traverses an HDF5 file and generates a LaTeX dirtree representation
-of its structure, including groups, datasets, and attributes.
+of its structure, including groups, datasets, and attributes. The structure
+is read from the h5_catalog.py sidecar when it is up to date, so repeated
+runs do not walk the file again.
 
 Example:
     python h5_dirtree.py runtpe.h5
     python h5_dirtree.py runtpe.h5 --group /results
+    python h5_dirtree.py runtpe.h5 --no-cache
 """
 
 import argparse
@@ -20,6 +23,8 @@ import os
 import sys
 import textwrap
 
+from h5_catalog import H5Catalog
+
 
 class H5dirtree:
     """Generate LaTeX dirtree representation of HDF5 structure"""
@@ -44,6 +49,28 @@ class H5dirtree:
             h5name (str): Relative path of object in HDF5 file
             h5obj: h5py Group or Dataset object
         """
+        self.add_item(h5name, isinstance(h5obj, h5py.Dataset), h5obj.attrs.keys())
+
+    def add_catalog(self, catalog, group="/"):
+        """
+        Collect items from an H5Catalog instead of visiting the file
+
+        Parameters:
+            catalog (H5Catalog): Catalog of the HDF5 file
+            group (str): Group whose contents are listed
+        """
+        for h5name, entry in catalog.walk(group):
+            self.add_item(h5name, entry["kind"] == "dataset", entry["attrs"])
+
+    def add_item(self, h5name, is_dataset, attr_names):
+        """
+        Add one object and its attributes to the tree
+
+        Parameters:
+            h5name (str): Relative path of object in HDF5 file
+            is_dataset (bool): True for datasets, False for groups
+            attr_names: Names of the object's attributes
+        """
         # Nesting depth
         d = h5name.count("/") + self.offset
         n = os.path.basename(h5name)
@@ -52,7 +79,7 @@ class H5dirtree:
         # Determine object type
         label = (
             "{\\color[HTML]{1b9e77}(dataset)}"
-            if isinstance(h5obj, h5py.Dataset)
+            if is_dataset
             else "{\\color[HTML]{d95f02}(group)}"
         )
 
@@ -63,7 +90,7 @@ class H5dirtree:
         e = d + 1
         separator = "{\\color{lightgray}\\dotfill}"
         label = "{\\color[HTML]{7570b3}(attribute)}"
-        for k, v in h5obj.attrs.items():
+        for k in attr_names:
             self.items.append(
                 e * " " + ".{:} {:}{:}{:}".format(e, k, separator, label)
             )
@@ -118,8 +145,41 @@ def main():
         help="parser start point (i.e., assumed root level)",
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="walk the file directly instead of using the structure catalog",
+    )
+    parser.add_argument(
+        "--refresh",
+        "-r",
+        action="store_true",
+        help="rebuild the structure catalog before generating the tree",
+    )
+
     args = parser.parse_args()
 
+    h5dt = H5dirtree(basename=args.group, offset=2)
+
+    if not args.no_cache:
+        # Structure catalog (h5_catalog.py sidecar), built on first use
+        try:
+            catalog = H5Catalog.load(args.h5filename, refresh=args.refresh)
+        except Exception as e:
+            print("Couldn't process {:}".format(args.h5filename))
+            print("Error: {}".format(e))
+            sys.exit(1)
+
+        entry = catalog.get(args.group)
+        if entry is None or entry["kind"] != "group":
+            print("Group '{}' not found in {}".format(args.group, args.h5filename))
+            sys.exit(1)
+
+        h5dt.add_catalog(catalog, args.group)
+        h5dt.make_dirtree()
+        print(h5dt.dirtree)
+        return
+
     # Open HDF5 file
     try:
         f = h5py.File(args.h5filename, "r")
@@ -141,7 +201,6 @@ def main():
         sys.exit(1)
 
     # Generate tree
-    h5dt = H5dirtree(basename=args.group, offset=2)
     r.visititems(h5dt)
     h5dt.make_dirtree()
     print(h5dt.dirtree)
@@ -7,20 +7,40 @@ Usage: See --help for command-line interface
 
 This script provides utilities for navigating and extracting data from MCNP6.3+
 HDF5 output files, including mesh tallies, PTRAC data, and fission matrices.
+Mesh tallies are opened lazily through MeshTally, so planes and other
+hyperslabs are read without loading the full array. FissionMatrix wraps
+the stored CSR arrays for sparse eigen-analysis (requires scipy).
+Structure listings and path lookups use the h5_catalog.py sidecar.
 
 Example:
     python mcnp_hdf5_inspector.py runtpe.h5 --list-structure
     python mcnp_hdf5_inspector.py runtpe.h5 --extract-mesh 14
+    python mcnp_hdf5_inspector.py runtpe.h5 -m 14 --plane k=200 -o plane.npz
+    python mcnp_hdf5_inspector.py runtpe.h5 -m 14 -o mesh14.h5 -z gzip --shuffle
+    python mcnp_hdf5_inspector.py runtpe.h5 -m 14 --slice '..., 0:100, 2'
+    python mcnp_hdf5_inspector.py runtpe.h5 --extract-fmtx --eigen 4
+    python mcnp_hdf5_inspector.py seed*/runtpe.h5 --aggregate combined.h5 -j 8
+    python mcnp_hdf5_inspector.py runtpe.h5 -m 14 --reduce --slice '10:20, :, :' -j 8
 """
 
 import argparse
 import h5py
+import itertools
 import numpy as np
+import os
+import posixpath
+import re
 import sys
+import time
 from typing import Dict, List, Tuple, Optional
 
+from h5_catalog import H5Catalog
+from mcnp_numeric import combine_moments
 
-def list_structure(h5_file: str, group: str = "/", max_depth: Optional[int] = None) -> None:
+
+def list_structure(h5_file: str, group: str = "/", max_depth: Optional[int] = None,
+                   use_catalog: bool = True, refresh: bool = False,
+                   workers: Optional[int] = None) -> None:
     """
     List hierarchical structure of HDF5 file
 
@@ -28,21 +48,49 @@ def list_structure(h5_file: str, group: str = "/", max_depth: Optional[int] = No
         h5_file: Path to HDF5 file
         group: Starting group path (default: root)
         max_depth: Maximum depth to display (None = unlimited)
+        use_catalog: Answer from the cached structure catalog (built and
+            saved next to the file on first use) instead of walking the file
+        refresh: Rebuild the catalog first
+        workers: Processes for a parallel catalog build
     """
-    def print_structure(name, obj, depth=0):
+    def print_entry(name, kind, shape, dtype, attrs, depth=0):
         if max_depth is not None and depth > max_depth:
             return
 
         indent = "  " * depth
-        if isinstance(obj, h5py.Group):
+        if kind == 'group':
             print(f"{indent}📁 {name}/ (group)")
-        elif isinstance(obj, h5py.Dataset):
-            print(f"{indent}📄 {name} (dataset, shape: {obj.shape}, dtype: {obj.dtype})")
+        else:
+            print(f"{indent}📄 {name} (dataset, shape: {shape}, dtype: {dtype})")
 
         # Print attributes
-        for attr_name, attr_value in obj.attrs.items():
+        for attr_name, attr_value in attrs:
             print(f"{indent}  🏷️  @{attr_name} = {attr_value}")
 
+    if use_catalog:
+        catalog = H5Catalog.load(h5_file, refresh=refresh, workers=workers)
+        start = catalog.get(group)
+        if start is None:
+            print(f"Error: Group '{group}' not found")
+            return
+
+        def show(name, entry, depth):
+            shape = tuple(entry['shape']) if entry.get('shape') is not None else None
+            print_entry(name, entry['kind'], shape, entry.get('dtype'),
+                        entry['attrs'].items(), depth)
+
+        print(f"\nStructure of {h5_file} starting at '{group}':\n")
+        show(group, start, 0)
+        for name, entry in catalog.walk(group):
+            show(name, entry, name.count('/') + 1)
+        return
+
+    def print_structure(name, obj, depth=0):
+        is_dataset = isinstance(obj, h5py.Dataset)
+        print_entry(name, 'dataset' if is_dataset else 'group',
+                    obj.shape if is_dataset else None, obj.dtype if is_dataset else None,
+                    obj.attrs.items(), depth)
+
     with h5py.File(h5_file, 'r') as f:
         start_group = f.get(group)
         if start_group is None:
@@ -54,6 +102,462 @@ def list_structure(h5_file: str, group: str = "/", max_depth: Optional[int] = No
         start_group.visititems(lambda n, o: print_structure(n, o, n.count('/') + 1))
 
 
+MESH_AXES = ('i', 'j', 'k', 'energy', 'time')
+
+# Names tried (as datasets, then attributes) for the bin edges of each axis;
+# two-element "bounds" are expanded to equal-width bins
+_AXIS_EDGE_NAMES = {
+    'i': ('i_edges', 'x_edges', 'r_edges', 'i_bounds', 'x_bounds', 'r_bounds'),
+    'j': ('j_edges', 'y_edges', 'j_bounds', 'y_bounds'),
+    'k': ('k_edges', 'z_edges', 'theta_edges', 'k_bounds', 'z_bounds', 'theta_bounds'),
+    'energy': ('energy_edges', 'energy_bins', 'energy_bounds', 'e_edges'),
+    'time': ('time_edges', 'time_bins', 'time_bounds', 't_edges'),
+}
+
+
+def _probe_paths(f: h5py.File, possible_paths: List[str]) -> Optional[str]:
+    """First existing path, answered from the structure catalog when cached"""
+    catalog = H5Catalog.cached(f.filename)
+    if catalog is not None:
+        return catalog.first_present(possible_paths)
+    return next((path for path in possible_paths if path in f), None)
+
+
+def _find_mesh_group(f: h5py.File, tally_num: int) -> h5py.Group:
+    """Locate the HDF5 group of a mesh tally"""
+    # Try different path patterns
+    possible_paths = [
+        f'/results/mesh_tally_{tally_num}',
+        f'/mesh_tally_{tally_num}',
+        f'/tallies/fmesh_{tally_num}',
+    ]
+
+    path = _probe_paths(f, possible_paths)
+    if path is None:
+        raise ValueError(f"Mesh tally {tally_num} not found in {f.filename}")
+    return f[path]
+
+
+def _find_values_group(group: h5py.Group) -> Optional[h5py.Group]:
+    """Group holding the 'values' dataset, preferring energy_total/time_total"""
+    if 'values' in group:
+        return group
+    if 'energy_total/time_total/values' in group:
+        return group['energy_total/time_total']
+    for key in group.keys():
+        subgroup = group[key]
+        if isinstance(subgroup, h5py.Group):
+            found = _find_values_group(subgroup)
+            if found is not None:
+                return found
+    return None
+
+
+def _axis_edges(groups: List[h5py.Group], axis: str, n_bins: int) -> Optional[np.ndarray]:
+    """Bin edges for one axis from datasets or attributes, if recorded"""
+    for name in _AXIS_EDGE_NAMES.get(axis, ()):
+        for group in groups:
+            if name in group and isinstance(group[name], h5py.Dataset):
+                edges = group[name][()]
+            elif name in group.attrs:
+                edges = group.attrs[name]
+            else:
+                continue
+            edges = np.asarray(edges, dtype=np.float64).ravel()
+            if edges.size == n_bins + 1:
+                return edges
+            if edges.size == 2:
+                return np.linspace(edges[0], edges[1], n_bins + 1)
+    return None
+
+
+def _region_tiles(shape: Tuple[int, ...], chunks: Optional[Tuple[int, ...]], itemsize: int,
+                  region: Tuple[slice, ...], tile_bytes: int) -> List[Tuple[slice, ...]]:
+    """
+    Cover a region with tiles aligned to the dataset chunk grid
+
+    Tiles are whole multiples of the native chunk shape, grown from the
+    last axis forward up to tile_bytes, so each chunk is decoded by
+    exactly one tile. Contiguous datasets are treated as chunked by rows.
+    """
+    chunks = list(chunks or ((1,) + tuple(shape[1:])))
+    extent = [sl.stop - sl.start for sl in region]
+
+    tile = list(chunks)
+    for axis in reversed(range(len(shape))):
+        size = int(np.prod(tile)) * itemsize
+        if size >= tile_bytes:
+            break
+        aligned = -(-extent[axis] // chunks[axis]) * chunks[axis]
+        factor = max(1, min(tile_bytes // size, -(-aligned // chunks[axis])))
+        tile[axis] = chunks[axis] * factor
+
+    ranges = []
+    for sl, chunk, step in zip(region, chunks, tile):
+        first = sl.start // chunk * chunk
+        ranges.append([slice(max(a, sl.start), min(a + step, sl.stop))
+                       for a in range(first, sl.stop, step)])
+
+    return [tuple(t) for t in itertools.product(*ranges)
+            if all(sl.stop > sl.start for sl in t)]
+
+
+def parse_slice_expression(expr: str) -> tuple:
+    """
+    Parse a NumPy-style index expression such as '..., 10, :' or '0:50:2, :, 3'
+
+    Parameters:
+        expr: Comma-separated integers, start:stop:step slices and '...'
+
+    Returns:
+        Index tuple usable with MeshTally or h5py datasets
+    """
+    key = []
+    for part in expr.split(','):
+        part = part.strip()
+        if part in ('...', 'Ellipsis'):
+            key.append(Ellipsis)
+        elif ':' in part:
+            fields = part.split(':')
+            if len(fields) > 3:
+                raise ValueError(f"Invalid slice: '{part}'")
+            key.append(slice(*[int(v) if v.strip() else None for v in fields]))
+        elif part:
+            key.append(int(part))
+        else:
+            raise ValueError(f"Empty index in slice expression '{expr}'")
+    return tuple(key)
+
+
+class LazyDataset:
+    """
+    Read-on-index view of an HDF5 dataset
+
+    Indexing reads only the selected hyperslab; np.asarray() reads
+    everything.
+
+    Parameters:
+        dataset: h5py dataset
+        axes: Axis names, one per dimension
+    """
+
+    def __init__(self, dataset: h5py.Dataset, axes: Tuple[str, ...]):
+        self.dataset = dataset
+        self.axes = axes
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.dataset.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.dataset.dtype
+
+    @property
+    def ndim(self) -> int:
+        return self.dataset.ndim
+
+    def __len__(self) -> int:
+        return self.dataset.shape[0]
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.dataset[key]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.dataset[()]
+        return data.astype(dtype) if dtype is not None else data
+
+    def __repr__(self) -> str:
+        dims = ', '.join(f"{a}={n}" for a, n in zip(self.axes, self.shape))
+        return f"<LazyDataset {self.dataset.name} ({dims}) {self.dtype}>"
+
+
+class MeshTally:
+    """
+    Lazy handle on an HDF5 mesh tally
+
+    values and errors are LazyDataset views, so tally[..., k, :] or
+    tally.errors[:, :, k] read only that hyperslab from disk. Axes are
+    named (i, j, k, energy, time) in dataset order, or taken from an
+    'axes' attribute when the file records one.
+
+    Parameters:
+        h5_file: Path to HDF5 file or an open h5py.File
+        tally_num: Tally number (e.g., 14 for FMESH14)
+        path: Group holding values/errors relative to the tally group
+            (default: energy_total/time_total, else first found)
+
+    Example:
+        with MeshTally('runtpe.h5', 14) as tally:
+            plane = tally.plane('k', 10)
+    """
+
+    def __init__(self, h5_file, tally_num: int, path: Optional[str] = None):
+        self._own_file = isinstance(h5_file, str)
+        self.file = h5py.File(h5_file, 'r') if self._own_file else h5_file
+        self.tally_num = tally_num
+        try:
+            self.group = _find_mesh_group(self.file, tally_num)
+            data_group = self.group[path] if path else _find_values_group(self.group)
+            if data_group is None or 'values' not in data_group:
+                raise ValueError(f"No 'values' dataset found in tally {tally_num}")
+            self.data_group = data_group
+
+            values = data_group['values']
+            axes = data_group.attrs.get('axes', values.attrs.get('axes'))
+            if axes is not None and len(axes) == values.ndim:
+                self.axes = tuple(a.decode() if isinstance(a, bytes) else str(a) for a in axes)
+            else:
+                self.axes = (MESH_AXES + tuple(f'axis{n}' for n in range(5, values.ndim)))[:values.ndim]
+
+            self.values = LazyDataset(values, self.axes)
+            errors = data_group.get('errors')
+            self.errors = (LazyDataset(errors, self.axes)
+                           if isinstance(errors, h5py.Dataset) and errors.size else None)
+
+            groups = [data_group, self.group]
+            self.edges = {axis: _axis_edges(groups, axis, n)
+                          for axis, n in zip(self.axes, values.shape)}
+            self.metadata = dict(self.group.attrs.items())
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.values.shape
+
+    def centers(self, axis: str) -> Optional[np.ndarray]:
+        """Bin midpoints along a named axis (None if edges are unknown)"""
+        edges = self.edges[axis]
+        return None if edges is None else 0.5 * (edges[:-1] + edges[1:])
+
+    def axis_index(self, axis: str) -> int:
+        if axis not in self.axes:
+            raise ValueError(f"Unknown axis '{axis}' (axes: {', '.join(self.axes)})")
+        return self.axes.index(axis)
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.values[key]
+
+    def _expand_key(self, key) -> tuple:
+        """Index with '...' expanded and one entry per axis"""
+        key = key if isinstance(key, tuple) else (key,)
+        if sum(k is Ellipsis for k in key) > 1:
+            raise ValueError("Only one '...' allowed in an index")
+        if any(k is Ellipsis for k in key):
+            at = next(n for n, k in enumerate(key) if k is Ellipsis)
+            fill = (slice(None),) * (len(self.axes) - len(key) + 1)
+            key = key[:at] + fill + key[at + 1:]
+        if len(key) > len(self.axes):
+            raise ValueError(f"Too many indices for {len(self.axes)}-D mesh tally")
+        return key + (slice(None),) * (len(self.axes) - len(key))
+
+    def select(self, key) -> Dict:
+        """
+        Read one hyperslab of values and errors with its coordinates
+
+        Parameters:
+            key: Index expression (tuple of ints, slices and Ellipsis)
+
+        Returns:
+            Dictionary with 'values', 'errors', 'axes' of the result and
+            'edges' per remaining axis
+        """
+        key = self._expand_key(key)
+        axes, edges = [], {}
+        for axis, index, n in zip(self.axes, key, self.shape):
+            if isinstance(index, slice):
+                axes.append(axis)
+                if self.edges[axis] is not None:
+                    start, stop, step = index.indices(n)
+                    if step == 1:
+                        edges[axis] = self.edges[axis][start:stop + 1]
+                    else:
+                        lower = self.edges[axis][start:stop:step]
+                        edges[axis] = np.column_stack((lower, self.edges[axis][start + 1:stop + 1:step]))
+                else:
+                    edges[axis] = None
+
+        return {'values': self.values[key],
+                'errors': self.errors[key] if self.errors is not None else None,
+                'axes': tuple(axes),
+                'edges': edges}
+
+    def plane(self, axis: str, index: int) -> Dict:
+        """Read the plane at bin index along a named axis (see select)"""
+        key = [slice(None)] * len(self.axes)
+        key[self.axis_index(axis)] = index
+        return self.select(tuple(key))
+
+    def bin_volumes(self) -> Optional[np.ndarray]:
+        """
+        Cartesian bin volumes as an array broadcastable to the mesh shape
+
+        Returns:
+            Outer product of the i, j, k bin widths (singleton energy/time
+            axes), or None when the spatial edges are not recorded
+        """
+        spatial = [a for a in ('i', 'j', 'k') if a in self.axes]
+        if not spatial or any(self.edges[a] is None for a in spatial):
+            return None
+
+        volumes = np.ones([1] * len(self.axes))
+        for axis in spatial:
+            shape = [1] * len(self.axes)
+            shape[self.axis_index(axis)] = -1
+            volumes = volumes * np.diff(self.edges[axis]).reshape(shape)
+        return volumes
+
+    def reduce(self, region=Ellipsis, volumes='auto', workers: Optional[int] = None,
+               tile_bytes: int = 1 << 24) -> Dict:
+        """
+        Totals, averages and maxima over a region, computed chunk by chunk
+
+        The region is covered by tiles aligned to the dataset's chunk grid
+        (a few native chunks each, up to tile_bytes per array). Tiles are
+        reduced on a thread pool with at most 2 * workers tiles in
+        flight, so resident memory stays bounded. h5py serializes the
+        reads themselves; decoding overlaps with the NumPy reductions.
+
+        Relative errors are propagated assuming independent bins:
+        sigma_total = sqrt(sum((v * r)**2)).
+
+        The volume average is that of the energy/time total: values are
+        summed over the region's energy and time bins and averaged over its
+        spatial bins, sum(v * V) / sum(V), with V counted once per spatial
+        bin. With a single energy/time bin this is the plain volume average.
+
+        Parameters:
+            region: Index expression of the region (ints, step-1 slices,
+                '...'); default the whole mesh
+            volumes: Array broadcastable to the mesh shape and constant
+                along energy/time, 'auto' for bin_volumes() (uniform if
+                unknown) or None for uniform
+            workers: Worker threads (default: os.cpu_count(), max 8)
+            tile_bytes: Target bytes read per tile and array
+
+        Returns:
+            Dictionary with 'total', 'total_error', 'volume_average',
+            'volume_average_error', 'volume' (spatial volume of the
+            region), 'max', 'max_error',
+            'max_index', 'max_location' (bin centers, None where edges are
+            unknown), 'min', 'min_index' and 'n_bins'
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        region = self._region_slices(region)
+        if isinstance(volumes, str) and volumes == 'auto':
+            volumes = self.bin_volumes()
+        if volumes is not None:
+            volumes = np.broadcast_to(np.asarray(volumes, dtype=np.float64), self.shape)
+
+        # Spatial volume of the region: first energy/time bin only
+        spatial = tuple(sl if axis in ('i', 'j', 'k') else slice(sl.start, sl.start + 1)
+                        for axis, sl in zip(self.axes, region))
+        if volumes is not None:
+            region_volume = float(volumes[spatial].sum())
+        else:
+            region_volume = float(np.prod([sl.stop - sl.start for sl in spatial]))
+
+        workers = workers or min(os.cpu_count() or 1, 8)
+        tiles = _region_tiles(self.shape, self.values.dataset.chunks,
+                              self.values.dtype.itemsize, region, tile_bytes)
+
+        def reduce_tile(tile):
+            values = np.asarray(self.values[tile], dtype=np.float64)
+            sigma = (values * self.errors[tile] if self.errors is not None
+                     else np.zeros_like(values))
+            volume = volumes[tile] if volumes is not None else np.ones_like(values)
+            offset = np.array([sl.start for sl in tile])
+            imax = np.unravel_index(np.argmax(values), values.shape)
+            imin = np.unravel_index(np.argmin(values), values.shape)
+            return {'sum': values.sum(), 'var': np.square(sigma).sum(),
+                    'vsum': (values * volume).sum(), 'vvar': np.square(sigma * volume).sum(),
+                    'n': values.size,
+                    'max': values[imax], 'max_error': (sigma[imax] / values[imax]
+                                                       if values[imax] else 0.0),
+                    'max_index': tuple(int(i) for i in offset + imax),
+                    'min': values[imin], 'min_index': tuple(int(i) for i in offset + imin)}
+
+        total = {'sum': 0.0, 'var': 0.0, 'vsum': 0.0, 'vvar': 0.0, 'n': 0,
+                 'max': -np.inf, 'max_error': 0.0, 'max_index': None,
+                 'min': np.inf, 'min_index': None}
+
+        def combine(part):
+            for name in ('sum', 'var', 'vsum', 'vvar', 'n'):
+                total[name] += part[name]
+            if part['max'] > total['max']:
+                total.update(max=part['max'], max_error=part['max_error'],
+                             max_index=part['max_index'])
+            if part['min'] < total['min']:
+                total.update(min=part['min'], min_index=part['min_index'])
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for tile in tiles:
+                pending.append(pool.submit(reduce_tile, tile))
+                if len(pending) >= 2 * workers:
+                    combine(pending.pop(0).result())
+            for future in pending:
+                combine(future.result())
+
+        if total['n'] == 0:
+            raise ValueError("Empty reduction region")
+
+        def relative(var, value):
+            return float(np.sqrt(var) / abs(value)) if value else 0.0
+
+        location = None
+        if total['max_index'] is not None:
+            location = tuple(None if self.edges[a] is None else float(self.centers(a)[i])
+                             for a, i in zip(self.axes, total['max_index']))
+
+        average = total['vsum'] / region_volume if region_volume else 0.0
+        return {'total': float(total['sum']),
+                'total_error': relative(total['var'], total['sum']),
+                'volume_average': float(average),
+                'volume_average_error': relative(total['vvar'], total['vsum']),
+                'volume': region_volume,
+                'max': float(total['max']),
+                'max_error': float(total['max_error']),
+                'max_index': total['max_index'],
+                'max_location': location,
+                'min': float(total['min']),
+                'min_index': total['min_index'],
+                'n_bins': int(total['n'])}
+
+    def _region_slices(self, region) -> Tuple[slice, ...]:
+        """Region as one step-1 slice per axis (integers keep their axis)"""
+        slices = []
+        for index, n in zip(self._expand_key(region), self.shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(n)
+                if step != 1:
+                    raise ValueError("Reduction regions must use step-1 slices")
+            else:
+                start = int(index) + n if int(index) < 0 else int(index)
+                if not 0 <= start < n:
+                    raise ValueError(f"Index {index} out of range for axis of length {n}")
+                stop = start + 1
+            slices.append(slice(start, max(start, stop)))
+        return tuple(slices)
+
+    def close(self) -> None:
+        if self._own_file and self.file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        dims = ', '.join(f"{a}={n}" for a, n in zip(self.axes, self.shape))
+        return f"<MeshTally {self.tally_num} ({dims})>"
+
+
 def extract_mesh_tally(h5_file: str, tally_num: int) -> Dict[str, np.ndarray]:
     """
     Extract mesh tally data from HDF5 file
@@ -64,55 +568,221 @@ def extract_mesh_tally(h5_file: str, tally_num: int) -> Dict[str, np.ndarray]:
 
     Returns:
         Dictionary with 'values', 'errors', 'metadata'
+
+    Note:
+        Reads the full arrays; use MeshTally to read hyperslabs only.
     """
-    with h5py.File(h5_file, 'r') as f:
-        # Try different path patterns
-        possible_paths = [
-            f'/results/mesh_tally_{tally_num}',
-            f'/mesh_tally_{tally_num}',
-            f'/tallies/fmesh_{tally_num}',
-        ]
+    with MeshTally(h5_file, tally_num) as tally:
+        return {'values': tally.values[()],
+                'errors': tally.errors[()] if tally.errors is not None else None,
+                'metadata': tally.metadata}
 
-        mesh_group = None
-        for path in possible_paths:
-            if path in f:
-                mesh_group = f[path]
-                break
 
-        if mesh_group is None:
-            raise ValueError(f"Mesh tally {tally_num} not found in {h5_file}")
+_MESH_GROUP_NAME = re.compile(r'(?:mesh_tally|fmesh)_(\d+)$')
 
-        result = {}
+# Attribute names tried for the number of source histories
+_NPS_ATTRS = ('nps', 'histories', 'number_of_histories')
 
-        # Extract values (navigate energy_total/time_total or similar)
-        def find_values(group):
-            """Recursively find 'values' and 'errors' datasets"""
-            if 'values' in group:
-                return group['values'][:], group.get('errors', np.array([]))[:]
-            for key in group.keys():
-                subgroup = group[key]
-                if isinstance(subgroup, h5py.Group):
-                    vals, errs = find_values(subgroup)
-                    if vals is not None:
-                        return vals, errs
-            return None, None
 
-        values, errors = find_values(mesh_group)
+def find_mesh_tallies(h5_file: str) -> Dict[int, str]:
+    """
+    Mesh tallies present in an HDF5 file
 
-        if values is None:
-            raise ValueError(f"No 'values' dataset found in tally {tally_num}")
+    Parameters:
+        h5_file: Path to HDF5 file
 
-        result['values'] = values
-        result['errors'] = errors if errors.size > 0 else None
+    Returns:
+        Dictionary mapping tally number to group path
+    """
+    catalog = H5Catalog.load(h5_file, persist=False)
+    tallies = {}
+    for _, entry in catalog.walk('/'):
+        match = _MESH_GROUP_NAME.search(entry['path'])
+        if entry['kind'] == 'group' and match:
+            tallies.setdefault(int(match.group(1)), entry['path'])
+    return tallies
 
-        # Extract metadata
-        metadata = {}
-        for attr_name, attr_value in mesh_group.attrs.items():
-            metadata[attr_name] = attr_value
 
-        result['metadata'] = metadata
+def _history_count(f: h5py.File, path: str) -> Optional[int]:
+    """NPS recorded on a group, one of its parents, or the file root"""
+    while True:
+        attrs = f[path].attrs
+        for name in _NPS_ATTRS:
+            if name in attrs:
+                return int(np.asarray(attrs[name]).ravel()[0])
+        if path in ('/', ''):
+            return None
+        path = path.rsplit('/', 1)[0] or '/'
 
-        return result
+
+# Open files of a worker process, reused across tiles
+_worker_files: Dict[str, h5py.File] = {}
+
+
+def _combine_tile(task: Tuple) -> Tuple[str, Tuple[slice, ...], np.ndarray, Optional[np.ndarray]]:
+    """
+    Worker: history-weighted mean and relative error of one tile
+
+    Reads the tile from every file and combines the estimates with
+    combine_moments from mcnp_numeric.
+    """
+    files, nps, group_path, tile, with_errors = task
+    values, errors = [], []
+    for path in files:
+        f = _worker_files.get(path)
+        if f is None:
+            f = _worker_files[path] = h5py.File(path, 'r')
+        group = f[group_path]
+        values.append(group['values'][tile].astype(np.float64))
+        errors.append(group['errors'][tile].astype(np.float64) if with_errors
+                      else np.zeros_like(values[-1]))
+
+    mean, rel = combine_moments(np.asarray(nps), values, errors)
+    return group_path, tile, mean, rel if with_errors else None
+
+
+def _copy_layout(src: h5py.Group, dst: h5py.Group, data_groups: Dict[str, bool]) -> None:
+    """Copy a tally group, creating empty values/errors datasets in data groups"""
+    dst.attrs.update(dict(src.attrs.items()))
+    for name, obj in src.items():
+        if isinstance(obj, h5py.Group):
+            _copy_layout(obj, dst.require_group(name), data_groups)
+        elif obj.parent.name in data_groups and name in ('values', 'errors'):
+            if name == 'errors' and not data_groups[obj.parent.name]:
+                continue
+            dataset = dst.create_dataset(name, shape=obj.shape, dtype=np.float64,
+                                         chunks=obj.chunks, compression=obj.compression,
+                                         compression_opts=obj.compression_opts,
+                                         shuffle=obj.shuffle)
+            dataset.attrs.update(dict(obj.attrs.items()))
+        else:
+            src.file.copy(obj, dst, name)
+
+
+def aggregate_mesh_tallies(h5_files: List[str], output: str,
+                           tally_nums: Optional[List[int]] = None,
+                           nps: Optional[List[int]] = None,
+                           workers: Optional[int] = None,
+                           tile_bytes: int = 1 << 24) -> Dict:
+    """
+    Combine mesh tallies from independent runs (different RAND SEEDs)
+
+    Tallies present in every file are combined with history weighting
+    and written to a new HDF5 file with the layout of the first file.
+    Values and errors are processed tile by tile along the chunk grid; a
+    process pool reads each tile from all files, so reads of different
+    tiles overlap, and at most 2 * workers tiles are in flight.
+
+    Parameters:
+        h5_files: HDF5 result files with identical mesh layouts
+        output: Path for the combined HDF5 file
+        tally_nums: Tallies to combine (default: all common mesh tallies)
+        nps: Histories per file (default: 'nps' attribute on the tally
+            group, a parent group or the file root)
+        workers: Worker processes (default: os.cpu_count(), max 8)
+        tile_bytes: Target bytes per tile and file
+
+    Returns:
+        Dictionary with 'nps' (combined histories), 'n_files' and
+        'tally_numbers'
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if len(h5_files) < 2:
+        raise ValueError("At least two HDF5 files are required for aggregation")
+    if os.path.abspath(output) in {os.path.abspath(p) for p in h5_files}:
+        raise ValueError("Output file must differ from the input files")
+
+    found = [find_mesh_tallies(path) for path in h5_files]
+    common = sorted(set.intersection(*(set(t) for t in found)))
+    if tally_nums:
+        missing = sorted(set(tally_nums) - set(common))
+        if missing:
+            raise ValueError(f"Mesh tallies not present in every file: {missing}")
+        common = sorted(set(tally_nums))
+    if not common:
+        raise ValueError("No mesh tally is present in every file")
+
+    # Values groups of each tally (e.g. energy_total/time_total) and checks
+    layout = {}
+    file_nps = []
+    for i, path in enumerate(h5_files):
+        with h5py.File(path, 'r') as f:
+            counts = set()
+            for num in common:
+                tally_path = found[i][num]
+                if found[0][num] != tally_path:
+                    raise ValueError(f"Mesh tally {num} is at {tally_path} in {path}, "
+                                     f"not {found[0][num]}")
+                groups = []
+                f[tally_path].visititems(lambda name, obj: groups.append(obj.parent.name)
+                                         if posixpath.basename(name) == 'values'
+                                         and isinstance(obj, h5py.Dataset) else None)
+                for group_path in groups:
+                    shape = f[group_path]['values'].shape
+                    has_errors = 'errors' in f[group_path]
+                    if i == 0:
+                        layout[group_path] = (shape, has_errors)
+                    elif group_path not in layout or layout[group_path][0] != shape:
+                        raise ValueError(f"{group_path} in {path} does not match {h5_files[0]}")
+                    else:
+                        layout[group_path] = (shape, layout[group_path][1] and has_errors)
+                counts.add(_history_count(f, tally_path))
+            if nps is None:
+                if None in counts or len(counts) != 1:
+                    raise ValueError(f"Cannot determine the histories of {path}; pass nps")
+                file_nps.append(counts.pop())
+
+    file_nps = [int(n) for n in (nps if nps is not None else file_nps)]
+    if len(file_nps) != len(h5_files):
+        raise ValueError("nps needs one entry per file")
+
+    workers = workers or min(os.cpu_count() or 1, 8)
+    total_nps = int(np.sum(file_nps))
+    files = [os.path.abspath(p) for p in h5_files]
+
+    with h5py.File(h5_files[0], 'r') as first, h5py.File(output, 'w') as out:
+        out.attrs.update(dict(first.attrs.items()))
+        tasks = []
+        for num in common:
+            tally_path = found[0][num]
+            data_groups = {g: e for g, (_, e) in layout.items()
+                           if g.startswith(tally_path + '/') or g == tally_path}
+            dst = out.require_group(tally_path)
+            _copy_layout(first[tally_path], dst, data_groups)
+
+            dst.attrs['nps'] = total_nps
+            dst.attrs['aggregation'] = 'history-weighted mean'
+            dst.attrs['aggregated_files'] = np.array(files, dtype=h5py.string_dtype())
+            dst.attrs['aggregated_nps'] = np.array(file_nps, dtype=np.int64)
+
+            for group_path, with_errors in data_groups.items():
+                values = first[group_path]['values']
+                region = tuple(slice(0, n) for n in values.shape)
+                for tile in _region_tiles(values.shape, values.chunks, 8, region, tile_bytes):
+                    tasks.append((files, file_nps, group_path, tile, with_errors))
+
+        def write(result):
+            group_path, tile, mean, rel = result
+            out[group_path]['values'][tile] = mean
+            if rel is not None:
+                out[group_path]['errors'][tile] = rel
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for task in tasks:
+                pending.append(pool.submit(_combine_tile, task))
+                if len(pending) >= 2 * workers:
+                    write(pending.pop(0).result())
+            for future in pending:
+                write(future.result())
+
+    return {'nps': total_nps, 'n_files': len(h5_files), 'tally_numbers': common}
+
+
+# Common PTRAC datasets
+PTRAC_DATASET_NAMES = ['x', 'y', 'z', 'u', 'v', 'w', 'energy', 'time',
+                       'cell', 'surface', 'event_type', 'history']
 
 
 def extract_ptrac(h5_file: str, particle_num: int = 1) -> Dict[str, np.ndarray]:
@@ -134,22 +804,14 @@ def extract_ptrac(h5_file: str, particle_num: int = 1) -> Dict[str, np.ndarray]:
             f'/tracks/particle_{particle_num}',
         ]
 
-        ptrac_group = None
-        for path in possible_paths:
-            if path in f:
-                ptrac_group = f[path]
-                break
-
-        if ptrac_group is None:
+        path = _probe_paths(f, possible_paths)
+        if path is None:
             raise ValueError(f"PTRAC data for particle {particle_num} not found")
+        ptrac_group = f[path]
 
         result = {}
 
-        # Common PTRAC datasets
-        dataset_names = ['x', 'y', 'z', 'u', 'v', 'w', 'energy', 'time',
-                         'cell', 'surface', 'event_type', 'history']
-
-        for name in dataset_names:
+        for name in PTRAC_DATASET_NAMES:
             if name in ptrac_group:
                 result[name] = ptrac_group[name][:]
 
@@ -159,6 +821,40 @@ def extract_ptrac(h5_file: str, particle_num: int = 1) -> Dict[str, np.ndarray]:
         return result
 
 
+# Dataset names used for the CSR arrays by different MCNP versions
+_FMTX_NAMES = {
+    'values': ('values', 'data'),
+    'column_indices': ('column_indices', 'col_ind', 'indices'),
+    'row_pointers': ('row_pointers', 'row_ptr', 'indptr'),
+}
+
+
+def _find_fission_matrix_group(f: h5py.File) -> h5py.Group:
+    """Locate the fission matrix group"""
+    # Fission matrix typically in /fission_matrix or /results/fission_matrix
+    possible_paths = [
+        '/fission_matrix',
+        '/results/fission_matrix',
+        '/tallies/fission_matrix',
+    ]
+
+    path = _probe_paths(f, possible_paths)
+    if path is None:
+        raise ValueError("Fission matrix not found in HDF5 file")
+    return f[path]
+
+
+def _read_csr_arrays(fm_group: h5py.Group) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Read the values / column index / row pointer datasets of a CSR group"""
+    arrays = []
+    for key, names in _FMTX_NAMES.items():
+        name = next((n for n in names if n in fm_group), None)
+        if name is None:
+            raise ValueError(f"Fission matrix has no '{key}' dataset")
+        arrays.append(fm_group[name][:])
+    return tuple(arrays)
+
+
 def extract_fission_matrix(h5_file: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Extract fission matrix in CSR (Compressed Sparse Row) format
@@ -170,28 +866,309 @@ def extract_fission_matrix(h5_file: str) -> Tuple[np.ndarray, np.ndarray, np.nda
         Tuple of (values, column_indices, row_pointers)
     """
     with h5py.File(h5_file, 'r') as f:
-        # Fission matrix typically in /fission_matrix or /results/fission_matrix
-        possible_paths = [
-            '/fission_matrix',
-            '/results/fission_matrix',
-            '/tallies/fission_matrix',
-        ]
+        # CSR format: values, column_indices, row_pointers
+        return _read_csr_arrays(_find_fission_matrix_group(f))
+
 
-        fm_group = None
-        for path in possible_paths:
-            if path in f:
-                fm_group = f[path]
-                break
+class FissionMatrix:
+    """
+    Sparse fission matrix with eigen-analysis (requires scipy)
 
-        if fm_group is None:
-            raise ValueError("Fission matrix not found in HDF5 file")
+    Element (i, j) is the expected number of fission neutrons born in
+    region i per source neutron started in region j, so the fundamental
+    source shape is the dominant right eigenvector. The CSR triplets are
+    wrapped as a scipy.sparse.csr_matrix without copying and the
+    eigenpairs come from ARPACK, so the matrix is never densified.
 
-        # CSR format: values, column_indices, row_pointers
-        values = fm_group['values'][:]
-        column_indices = fm_group['column_indices'][:]
-        row_pointers = fm_group['row_pointers'][:]
+    Parameters:
+        values: Non-zero entries
+        column_indices: Column index of each entry
+        row_pointers: Start of each row in values (length n_rows + 1)
+        shape: Matrix shape (default: square, n_rows x n_rows)
+        metadata: Attributes of the source HDF5 group
+    """
+
+    def __init__(self, values: np.ndarray, column_indices: np.ndarray,
+                 row_pointers: np.ndarray, shape: Optional[Tuple[int, int]] = None,
+                 metadata: Optional[Dict] = None):
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("Fission matrix analysis requires scipy (pip install scipy)") from None
+
+        n_rows = len(row_pointers) - 1
+        if n_rows < 1:
+            raise ValueError("Fission matrix has no rows")
+        if shape is None:
+            shape = (n_rows, n_rows)
+
+        # The csr_matrix constructor may downcast int64 indices (a copy), so
+        # the arrays are attached directly and validated in place
+        index_dtype = np.promote_types(column_indices.dtype, row_pointers.dtype)
+        if np.dtype(index_dtype).itemsize < 4:
+            index_dtype = np.int32
+        matrix = csr_matrix(tuple(int(n) for n in shape), dtype=values.dtype)
+        matrix.data = values
+        matrix.indices = column_indices.astype(index_dtype, copy=False)
+        matrix.indptr = row_pointers.astype(index_dtype, copy=False)
+        matrix.check_format(full_check=False)
+        self.matrix = matrix
+        self.metadata = metadata or {}
+        self._eigen = None
+
+    @classmethod
+    def from_hdf5(cls, h5_file: str) -> 'FissionMatrix':
+        """Load the fission matrix stored in an MCNP HDF5 file"""
+        with h5py.File(h5_file, 'r') as f:
+            fm_group = _find_fission_matrix_group(f)
+            values, cols, rows = _read_csr_arrays(fm_group)
+            metadata = dict(fm_group.attrs.items())
+
+        shape = metadata.get('shape')
+        if shape is None and 'n_rows' in metadata and 'n_cols' in metadata:
+            shape = (metadata['n_rows'], metadata['n_cols'])
+        return cls(values, cols, rows, shape, metadata)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+
+    @property
+    def nnz(self) -> int:
+        return self.matrix.nnz
+
+    @property
+    def density(self) -> float:
+        """Fraction of stored entries, nnz / (n_rows * n_cols)"""
+        n_rows, n_cols = self.shape
+        return self.nnz / (float(n_rows) * float(n_cols))
+
+    def eigenpairs(self, k: int = 2, tol: float = 1e-10,
+                   maxiter: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Largest-magnitude eigenvalues and right eigenvectors
+
+        Uses ARPACK (scipy.sparse.linalg.eigs); matrices too small for
+        ARPACK (n <= k + 1) are solved densely.
+
+        Parameters:
+            k: Number of eigenpairs
+            tol: ARPACK relative accuracy
+            maxiter: ARPACK iteration limit (default: scipy's)
+
+        Returns:
+            (eigenvalues, eigenvectors) sorted by decreasing magnitude;
+            eigenvectors are columns
+        """
+        n_rows, n_cols = self.shape
+        if n_rows != n_cols:
+            raise ValueError(f"Eigen-analysis needs a square matrix, got {self.shape}")
+        k = max(1, min(int(k), n_rows))
+
+        if self._eigen is not None and len(self._eigen[0]) >= k:
+            return self._eigen[0][:k], self._eigen[1][:, :k]
+
+        if n_rows <= k + 1:
+            values, vectors = np.linalg.eig(self.matrix.toarray())
+        else:
+            from scipy.sparse.linalg import eigs
+            values, vectors = eigs(self.matrix, k=k, which='LM', tol=tol, maxiter=maxiter)
+
+        order = np.argsort(-np.abs(values))[:k]
+        self._eigen = (values[order], vectors[:, order])
+        return self._eigen
+
+    def keff(self) -> float:
+        """Fundamental eigenvalue (k-effective estimate)"""
+        values, _ = self.eigenpairs(1)
+        return float(values[0].real)
+
+    def dominance_ratio(self) -> float:
+        """|lambda_1| / |lambda_0|; values near 1 mean slow source convergence"""
+        values, _ = self.eigenpairs(2)
+        if len(values) < 2:
+            raise ValueError("Dominance ratio needs at least two eigenvalues")
+        return float(abs(values[1]) / abs(values[0]))
+
+    def source_shape(self, mode: int = 0) -> np.ndarray:
+        """
+        Source shape of an eigenmode
+
+        Parameters:
+            mode: 0 for the fundamental mode, 1 for the first harmonic, ...
+
+        Returns:
+            Real eigenvector; the fundamental mode is signed positive and
+            normalized to sum to 1, harmonics to unit maximum magnitude
+        """
+        _, vectors = self.eigenpairs(mode + 1)
+        if vectors.shape[1] <= mode:
+            raise ValueError(f"Mode {mode} not available for a {self.shape[0]}-row matrix")
+        shape = vectors[:, mode].real
+        if mode == 0:
+            total = shape.sum()
+            return shape / total if total else shape
+        peak = shape[np.argmax(np.abs(shape))]
+        return shape / peak if peak else shape
+
+    def summary(self, k: int = 2) -> Dict:
+        """Size, density, leading eigenvalues and dominance ratio"""
+        values, _ = self.eigenpairs(k)
+        result = {'shape': self.shape, 'nnz': self.nnz, 'density': self.density,
+                  'eigenvalues': values}
+        if len(values) > 1:
+            result['dominance_ratio'] = float(abs(values[1]) / abs(values[0]))
+        return result
 
-        return values, column_indices, row_pointers
+
+EXPORT_COMPRESSION = ('none', 'gzip', 'lzf')
+
+
+def _row_tiles(array, tile_bytes: int) -> List[Tuple[slice, ...]]:
+    """Tiles of whole leading-axis rows, aligned to the source chunking"""
+    shape = array.shape
+    if not shape:
+        return [()]
+    chunks = getattr(array, 'chunks', None)
+    rows = chunks[0] if chunks else 1
+    region = tuple(slice(0, n) for n in shape)
+    return _region_tiles(shape, (rows,) + tuple(shape[1:]), array.dtype.itemsize,
+                         region, tile_bytes)
+
+
+def _export_hdf5(sources: Dict, output: str, compression: Optional[str],
+                 level: Optional[int], shuffle: bool, attrs: Dict, tile_bytes: int) -> int:
+    """Copy arrays into an HDF5 file tile by tile; returns bytes copied"""
+    copied = 0
+    with h5py.File(output, 'w') as out:
+        out.attrs.update({k: v for k, v in attrs.items() if v is not None})
+        for name, array in sources.items():
+            filtered = compression is not None or shuffle
+            chunks = getattr(array, 'chunks', None) or (True if filtered and array.shape else None)
+            opts = level if compression == 'gzip' else None
+            dst = out.create_dataset(name, shape=array.shape, dtype=array.dtype,
+                                     chunks=chunks if array.shape else None,
+                                     compression=compression if array.shape else None,
+                                     compression_opts=opts if array.shape else None,
+                                     shuffle=shuffle and bool(array.shape))
+            if isinstance(array, h5py.Dataset):
+                dst.attrs.update(dict(array.attrs.items()))
+                tiles = _region_tiles(array.shape, array.chunks, array.dtype.itemsize,
+                                      tuple(slice(0, n) for n in array.shape), tile_bytes)
+            else:
+                tiles = _row_tiles(array, tile_bytes)
+            for tile in tiles:
+                block = array[tile]
+                dst[tile] = block
+                copied += np.asarray(block).nbytes
+    return copied
+
+
+def _export_npz(sources: Dict, output: str, compression: Optional[str],
+                level: Optional[int], metadata: Optional[Dict], tile_bytes: int) -> int:
+    """Stream arrays into NPZ members row block by row block; returns bytes copied"""
+    import zipfile
+
+    if compression == 'lzf':
+        raise ValueError("NPZ export supports gzip (deflate) compression only")
+    mode = zipfile.ZIP_DEFLATED if compression == 'gzip' else zipfile.ZIP_STORED
+    copied = 0
+    with zipfile.ZipFile(output, 'w', compression=mode, allowZip64=True,
+                         compresslevel=level if compression == 'gzip' else None) as zf:
+        for name, array in sources.items():
+            with zf.open(f"{name}.npy", 'w', force_zip64=True) as fh:
+                header = {'descr': np.lib.format.dtype_to_descr(array.dtype),
+                          'fortran_order': False, 'shape': tuple(array.shape)}
+                np.lib.format.write_array_header_2_0(fh, header)
+                for tile in _row_tiles(array, tile_bytes):
+                    block = np.ascontiguousarray(array[tile])
+                    fh.write(block.data)
+                    copied += block.nbytes
+        if metadata:
+            # Attributes as a pickled dict, matching np.savez(metadata=...)
+            with zf.open('metadata.npy', 'w') as fh:
+                np.lib.format.write_array(fh, np.asanyarray(metadata, dtype=object),
+                                          allow_pickle=True)
+    return copied
+
+
+def _export_npy(sources: Dict, output: str, tile_bytes: int) -> int:
+    """Fill memory-mapped .npy files tile by tile; returns bytes copied"""
+    if output.endswith('.npy'):
+        if len(sources) != 1:
+            raise ValueError("A .npy output holds one array; give a directory instead")
+        paths = {name: output for name in sources}
+    else:
+        os.makedirs(output, exist_ok=True)
+        paths = {name: os.path.join(output, f"{name.replace('/', '_')}.npy") for name in sources}
+
+    copied = 0
+    for name, array in sources.items():
+        target = np.lib.format.open_memmap(paths[name], mode='w+', dtype=array.dtype,
+                                           shape=tuple(array.shape))
+        for tile in _row_tiles(array, tile_bytes):
+            target[tile] = array[tile]
+            copied += target[tile].nbytes
+        target.flush()
+        del target
+    return copied
+
+
+def export_arrays(sources: Dict, output: str, fmt: Optional[str] = None,
+                  compression: Optional[str] = None, level: Optional[int] = None,
+                  shuffle: bool = False, metadata: Optional[Dict] = None,
+                  tile_bytes: int = 1 << 24) -> Dict:
+    """
+    Export HDF5 datasets or arrays without materializing them
+
+    Datasets are copied tile by tile: HDF5 targets keep the source chunk
+    shapes and tiles follow the chunk grid, NPZ members and .npy memmaps
+    are filled in leading-axis row blocks.
+
+    Parameters:
+        sources: Mapping of output name to h5py.Dataset or NumPy array
+        output: Output path (.h5/.hdf5, .npz, .npy or a directory of .npy)
+        fmt: 'hdf5', 'npz' or 'npy' (default: from the extension)
+        compression: None/'none', 'gzip' or 'lzf' (HDF5 only; NPZ uses
+            deflate for 'gzip')
+        level: gzip/deflate level
+        shuffle: Enable the HDF5 shuffle filter
+        metadata: Attributes stored on the HDF5 root or as an NPZ member
+        tile_bytes: Target bytes per copied tile
+
+    Returns:
+        Dictionary with 'format', 'bytes', 'seconds' and 'mb_per_s'
+    """
+    if fmt is None:
+        ext = os.path.splitext(output)[1].lower()
+        fmt = {'.h5': 'hdf5', '.hdf5': 'hdf5', '.npz': 'npz'}.get(ext, 'npy')
+    if compression == 'none':
+        compression = None
+    if compression not in (None, 'gzip', 'lzf'):
+        raise ValueError(f"Unknown compression: {compression}")
+
+    sources = {name: array for name, array in sources.items() if array is not None}
+    start = time.perf_counter()
+    if fmt == 'hdf5':
+        copied = _export_hdf5(sources, output, compression, level, shuffle,
+                              metadata or {}, tile_bytes)
+    elif fmt == 'npz':
+        copied = _export_npz(sources, output, compression, level, metadata, tile_bytes)
+    elif fmt == 'npy':
+        if compression or shuffle:
+            raise ValueError(".npy export does not support compression")
+        copied = _export_npy(sources, output, tile_bytes)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    seconds = max(time.perf_counter() - start, 1e-9)
+    return {'format': fmt, 'bytes': copied, 'seconds': seconds,
+            'mb_per_s': copied / 1e6 / seconds}
+
+
+def _report_export(stats: Dict, output: str) -> None:
+    print(f"\nSaved to {output} ({stats['format']}): {stats['bytes'] / 1e6:.1f} MB "
+          f"in {stats['seconds']:.2f} s ({stats['mb_per_s']:.1f} MB/s)")
 
 
 def get_attributes(h5_file: str, path: str) -> Dict:
@@ -220,7 +1197,8 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument('h5file', help='HDF5 file to inspect')
+    parser.add_argument('h5file', nargs='+',
+                        help='HDF5 file to inspect (several files with --aggregate)')
 
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--list-structure', '-l', action='store_true',
@@ -232,54 +1210,183 @@ def main():
                        help='Extract PTRAC data (default particle: 1=neutron)')
     group.add_argument('--extract-fmtx', '-f', action='store_true',
                        help='Extract fission matrix')
+    group.add_argument('--aggregate', '-a', metavar='OUT',
+                       help='Combine the mesh tallies of several runs into HDF5 file OUT')
 
     parser.add_argument('--group', '-g', default='/',
                         help='Starting group for structure listing (default: /)')
     parser.add_argument('--max-depth', '-d', type=int,
                         help='Maximum depth for structure listing')
-    parser.add_argument('--output', '-o', help='Output file for extracted data (NPZ format)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='List by walking the file instead of the structure catalog')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Rebuild the structure catalog before listing')
+    parser.add_argument('--slice', '-s', metavar='EXPR',
+                        help="Mesh hyperslab to read, NumPy style (e.g. '..., 10, :')")
+    parser.add_argument('--plane', metavar='AXIS=INDEX',
+                        help='Mesh plane to read along a named axis (e.g. k=10, energy=2)')
+    parser.add_argument('--reduce', '-r', action='store_true',
+                        help='Print totals, volume average and extrema of the mesh '
+                             '(or of the --slice/--plane region) with propagated errors')
+    parser.add_argument('--workers', '-j', type=int,
+                        help='Worker threads for --reduce (default: CPU count, max 8), '
+                             'processes for --aggregate or a catalog build')
+    parser.add_argument('--eigen', '-k', type=int, nargs='?', const=2, metavar='K',
+                        help='With -f: compute K leading eigenvalues (default 2), the '
+                             'dominance ratio and fundamental source shape')
+    parser.add_argument('--tallies', '-t', type=int, nargs='+', metavar='NUM',
+                        help='Mesh tallies for --aggregate (default: all common)')
+    parser.add_argument('--nps', type=int, nargs='+',
+                        help='Histories per file for --aggregate (default: nps attributes)')
+    parser.add_argument('--output', '-o',
+                        help='Output for extracted data: .npz, .h5/.hdf5, .npy or a '
+                             'directory of .npy files (copied chunk by chunk)')
+    parser.add_argument('--compression', '-z', choices=EXPORT_COMPRESSION, default='none',
+                        help='Output compression: gzip (HDF5 or NPZ) or lzf (HDF5)')
+    parser.add_argument('--compression-level', type=int,
+                        help='gzip/deflate level for --compression gzip')
+    parser.add_argument('--shuffle', action='store_true',
+                        help='Enable the HDF5 shuffle filter for .h5 output')
 
     args = parser.parse_args()
 
+    if not args.aggregate and len(args.h5file) > 1:
+        parser.error("several HDF5 files are only accepted with --aggregate")
+    h5_files = args.h5file
+    args.h5file = h5_files[0]
+
     try:
-        if args.list_structure:
-            list_structure(args.h5file, args.group, args.max_depth)
+        if args.aggregate:
+            start = time.perf_counter()
+            info = aggregate_mesh_tallies(h5_files, args.aggregate, args.tallies,
+                                          args.nps, args.workers)
+            print(f"\nCombined mesh tallies {', '.join(map(str, info['tally_numbers']))} "
+                  f"from {info['n_files']} files ({info['nps']} histories) "
+                  f"in {time.perf_counter() - start:.2f} s")
+            print(f"Saved to {args.aggregate}")
+
+        elif args.list_structure:
+            list_structure(args.h5file, args.group, args.max_depth,
+                           use_catalog=not args.no_cache, refresh=args.refresh,
+                           workers=args.workers)
 
         elif args.extract_mesh is not None:
-            data = extract_mesh_tally(args.h5file, args.extract_mesh)
-            print(f"\nExtracted mesh tally {args.extract_mesh}:")
-            print(f"  Values shape: {data['values'].shape}")
-            if data['errors'] is not None:
-                print(f"  Errors shape: {data['errors'].shape}")
-            print(f"  Metadata: {data['metadata']}")
-
-            if args.output:
-                np.savez(args.output, **data)
-                print(f"\nSaved to {args.output}")
+            with MeshTally(args.h5file, args.extract_mesh) as tally:
+                print(f"\nMesh tally {args.extract_mesh}: "
+                      + ', '.join(f"{a}={n}" for a, n in zip(tally.axes, tally.shape)))
+
+                if args.reduce:
+                    region = (parse_slice_expression(args.slice) if args.slice
+                              else Ellipsis)
+                    if args.plane:
+                        axis, _, index = args.plane.partition('=')
+                        region = [slice(None)] * len(tally.axes)
+                        region[tally.axis_index(axis.strip())] = int(index)
+                        region = tuple(region)
+                    start = time.perf_counter()
+                    stats = tally.reduce(region, workers=args.workers)
+                    elapsed = time.perf_counter() - start
+                    print(f"  Region bins:     {stats['n_bins']}")
+                    print(f"  Total:           {stats['total']:.6E} "
+                          f"(rel. error {stats['total_error']:.4f})")
+                    print(f"  Volume average:  {stats['volume_average']:.6E} "
+                          f"(rel. error {stats['volume_average_error']:.4f}, "
+                          f"volume {stats['volume']:.6E})")
+                    print(f"  Maximum:         {stats['max']:.6E} "
+                          f"(rel. error {stats['max_error']:.4f}) at "
+                          + ', '.join(f"{a}={i}" for a, i in zip(tally.axes, stats['max_index'])))
+                    if stats['max_location'] and any(c is not None for c in stats['max_location']):
+                        print("                   bin center "
+                              + ', '.join(f"{a}={c:.6g}" for a, c in
+                                          zip(tally.axes, stats['max_location']) if c is not None))
+                    print(f"  Minimum:         {stats['min']:.6E} at "
+                          + ', '.join(f"{a}={i}" for a, i in zip(tally.axes, stats['min_index'])))
+                    print(f"  Reduced in {elapsed:.2f} s")
+                    return
+
+                if args.plane or args.slice:
+                    if args.plane:
+                        axis, _, index = args.plane.partition('=')
+                        if not index:
+                            raise ValueError("--plane expects AXIS=INDEX, e.g. k=10")
+                        selection = tally.plane(axis.strip(), int(index))
+                    else:
+                        selection = tally.select(parse_slice_expression(args.slice))
+                    values, errors = selection['values'], selection['errors']
+                    axes, edges = selection['axes'], selection['edges']
+                else:
+                    # Whole mesh: keep the lazy datasets, exports stream them
+                    values = tally.values.dataset
+                    errors = tally.errors.dataset if tally.errors is not None else None
+                    axes, edges = tally.axes, tally.edges
+
+                print(f"  Extracted axes: {', '.join(axes) or '(scalar)'}")
+                print(f"  Values shape: {np.shape(values)}")
+                if errors is not None:
+                    print(f"  Errors shape: {np.shape(errors)}")
+                if isinstance(values, np.ndarray) and values.size:
+                    print(f"  Values min/max: {np.min(values):.6E} / {np.max(values):.6E}")
+                print(f"  Metadata: {tally.metadata}")
+
+                if args.output:
+                    arrays = {'values': values, 'errors': errors}
+                    for axis, axis_edges in edges.items():
+                        if axis_edges is not None:
+                            arrays[f'{axis}_edges'] = np.asarray(axis_edges)
+                    stats = export_arrays(arrays, args.output, compression=args.compression,
+                                          level=args.compression_level, shuffle=args.shuffle,
+                                          metadata=tally.metadata)
+                    _report_export(stats, args.output)
 
         elif args.extract_ptrac is not None:
-            data = extract_ptrac(args.h5file, args.extract_ptrac)
-            print(f"\nExtracted PTRAC data for particle {args.extract_ptrac}:")
-            for key, value in data.items():
-                if key != 'metadata' and isinstance(value, np.ndarray):
+            with h5py.File(args.h5file, 'r') as f:
+                path = _probe_paths(f, [f'/particle_{args.extract_ptrac}',
+                                        f'/ptrac/particle_{args.extract_ptrac}',
+                                        f'/tracks/particle_{args.extract_ptrac}'])
+                if path is None:
+                    raise ValueError(f"PTRAC data for particle {args.extract_ptrac} not found")
+                ptrac_group = f[path]
+                datasets = {name: ptrac_group[name] for name in PTRAC_DATASET_NAMES
+                            if name in ptrac_group}
+                metadata = dict(ptrac_group.attrs.items())
+
+                print(f"\nExtracted PTRAC data for particle {args.extract_ptrac}:")
+                for key, value in datasets.items():
                     print(f"  {key}: shape {value.shape}")
-            print(f"  Metadata: {data['metadata']}")
+                print(f"  Metadata: {metadata}")
 
-            if args.output:
-                np.savez(args.output, **data)
-                print(f"\nSaved to {args.output}")
+                if args.output:
+                    stats = export_arrays(datasets, args.output, compression=args.compression,
+                                          level=args.compression_level, shuffle=args.shuffle,
+                                          metadata=metadata)
+                    _report_export(stats, args.output)
 
         elif args.extract_fmtx:
-            values, cols, rows = extract_fission_matrix(args.h5file)
+            fmtx = FissionMatrix.from_hdf5(args.h5file)
+            n_rows, n_cols = fmtx.shape
             print(f"\nExtracted fission matrix (CSR format):")
-            print(f"  Values: {len(values)} non-zero entries")
-            print(f"  Matrix size: {len(rows)-1} rows")
-            print(f"  Sparsity: {len(values)/(len(rows)-1)**2*100:.2f}%")
+            print(f"  Values: {fmtx.nnz} non-zero entries")
+            print(f"  Matrix size: {n_rows} x {n_cols}")
+            print(f"  Density: {fmtx.density*100:.4g}% (sparsity {(1 - fmtx.density)*100:.4g}%)")
+
+            arrays = {'values': fmtx.matrix.data, 'column_indices': fmtx.matrix.indices,
+                      'row_pointers': fmtx.matrix.indptr}
+            if args.eigen:
+                values, _ = fmtx.eigenpairs(args.eigen)
+                print(f"\n  Leading eigenvalues:")
+                for i, value in enumerate(values):
+                    print(f"    lambda_{i} = {value.real:.6f}"
+                          + (f" {value.imag:+.2e}j" if value.imag else ""))
+                if len(values) > 1:
+                    print(f"  Dominance ratio: {fmtx.dominance_ratio():.6f}")
+                arrays['eigenvalues'] = values
+                arrays['source_shape'] = fmtx.source_shape()
 
             if args.output:
-                np.savez(args.output, values=values, column_indices=cols,
-                         row_pointers=rows)
-                print(f"\nSaved to {args.output}")
+                stats = export_arrays(arrays, args.output, compression=args.compression,
+                                      level=args.compression_level, shuffle=args.shuffle,
+                                      metadata=fmtx.metadata)
+                _report_export(stats, args.output)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,72 @@
+"""
+MCNP Numeric Helpers
+
+Purpose: Small numeric routines shared by the MCTAL, PTRAC and HDF5 scripts
+
+Library module without a command-line interface; the scripts import it as
+a sibling (from mcnp_numeric import decode_floats).
+"""
+
+import numpy as np
+import re
+import warnings
+from typing import List, Tuple
+
+
+# Fortran E-format drops the "E" for three-digit exponents (1.23456-100)
+_FORTRAN_EXPONENT = re.compile(rb'(?<=[0-9.])([+-][0-9]{3})')
+
+
+def decode_floats(data: bytes) -> np.ndarray:
+    """
+    Bulk-convert whitespace-separated numbers to a float64 array
+
+    Parameters:
+        data: Raw text block
+
+    Returns:
+        1-D float64 array
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(data, dtype=np.float64, sep=' ')
+        except (DeprecationWarning, ValueError):
+            pass
+
+    # Rare path: repair exponents written without "E", then retry
+    return np.fromstring(_FORTRAN_EXPONENT.sub(rb'E\1', data), dtype=np.float64, sep=' ')
+
+
+def combine_moments(nps: np.ndarray, values: List[np.ndarray],
+                    errors: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    History-weighted combination of independent tally estimates
+
+    Each estimate is turned back into first and second per-history moments
+    (E[x] = mean, E[x^2] = (N-1)*s^2 + mean^2 with s = R*mean), the moments
+    are summed with weights N_i, and the combined mean and relative error
+    are formed from the totals.
+
+    Parameters:
+        nps: Histories of each run
+        values: Mean of each run (arrays of equal shape)
+        errors: Relative error of each run
+
+    Returns:
+        (combined mean, combined relative error)
+    """
+    total = float(np.sum(nps))
+    first = np.zeros_like(values[0])
+    second = np.zeros_like(values[0])
+    for n, mean, rel in zip(nps, values, errors):
+        sigma = rel * mean
+        first += n * mean
+        second += n * ((n - 1) * sigma * sigma + mean * mean)
+
+    mean = first / total
+    variance = np.maximum(second / total - mean * mean, 0.0) / max(total - 1, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rel = np.where(mean != 0, np.sqrt(variance) / np.abs(mean), 0.0)
+
+    return mean, rel
@@ -15,79 +15,493 @@ This script extracts key information from MCNP output files including:
 Example:
     python mcnp_output_parser.py output.txt --check-termination
     python mcnp_output_parser.py output.txt --extract-tally 14
+    python mcnp_output_parser.py output.txt --extract-all-tallies
+    python mcnp_output_parser.py output.txt --follow
 """
 
 import argparse
+import os
 import re
 import sys
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict
 
+import numpy as np
 
-def check_termination(filepath: str) -> Tuple[bool, str]:
+
+class OutpScanner:
     """
-    Check if MCNP run terminated normally
+    Single-pass state-machine scanner for MCNP OUTP files
+
+    Lines are fed one at a time (as raw bytes, so byte offsets stay exact)
+    and only the extracted results are kept, so memory is bounded by the
+    number of messages and tallies rather than the file size. One scan
+    yields termination status, warnings, fatal errors, keff, the problem
+    summary and the location of every tally section.
+
+    Example:
+        scanner = OutpScanner.scan_file('outp')
+        success, message = scanner.termination()
+    """
+
+    _TERMINATION = re.compile(r'run terminated when\s+(.+?)\.', re.IGNORECASE)
+    _KEFF_PM = re.compile(r'keff.*?=\s*([\d.]+)\s*\+\-\s*([\d.]+)', re.IGNORECASE)
+    _KEFF_FINAL = re.compile(r'final estimated combined collision/absorption/track-length keff\s*='
+                             r'\s*([\d.]+)\s+with an estimated standard deviation of\s+([\d.]+)',
+                             re.IGNORECASE)
+    _TALLY_HEADER = re.compile(r'^1tally\s+(\d+)\s+nps\s*=\s*(\d+)', re.IGNORECASE)
+    _HISTORIES = re.compile(r'run terminated when\s+(\d+)\s+particle histories were done',
+                            re.IGNORECASE)
+    _COMPUTER_TIME = re.compile(r'computer time\s*=\s*([\d.]+)\s*minutes', re.IGNORECASE)
+    _CHECKS_HEADER = re.compile(r'results of 10 statistical checks.*?tally\s+(\d+)', re.IGNORECASE)
+    _COLUMN_NAMES = re.compile(r'\S+\([^)]*\)|\S+')
+    # Print table 175 prints inactive cycles as one line,
+    #   cycle N  k(collision) x  [k(absorption) y  k(track length) z] ...
+    # and active cycles as a block headed "estimator cycle N ave of M cycles"
+    # with one k(...) line per estimator. Either is followed by the source
+    # entropy when it is computed.
+    _CYCLE_LINE = re.compile(r'^\s*cycle\s+(\d+)\s+k\(', re.IGNORECASE)
+    _CYCLE_BLOCK = re.compile(r'^\s*estimator\s+cycle\s+(\d+)\s+ave of', re.IGNORECASE)
+    _CYCLE_KEFF = re.compile(r'k\((collision|absorption|tr\w* length)\)\s+([\d.]+)', re.IGNORECASE)
+    _ENTROPY = re.compile(r'source_entropy\s*=?\s*(\S+)', re.IGNORECASE)
+
+    def __init__(self):
+        self.line_number = 0
+        self.offset = 0
+        self.warnings = []
+        self.errors = []
+        self.terminated = False
+        self.termination_reason = None
+        self.bad_trouble = False
+        self.keff = None
+        self.summary = None
+        self.tallies = []
+        self.statistical_checks = {}
+        self.fluctuation_charts = []
+        self.kcode_cycles = []
+        self._open_section = None
+        self._cycle_columns = None
+        self._pending_cycle = None
+        self._after_final_result = False
+
+    @classmethod
+    def scan_file(cls, filepath: str) -> 'OutpScanner':
+        """
+        Scan an OUTP file in one streaming pass
+
+        Parameters:
+            filepath: Path to OUTP file
+
+        Returns:
+            Scanner holding the extracted results
+        """
+        scanner = cls()
+        with open(filepath, 'rb') as f:
+            for raw in f:
+                scanner.feed(raw)
+        scanner.finish()
+        return scanner
+
+    def finish(self) -> None:
+        """Close the section (and KCODE cycle) still open at end of file"""
+        if self._pending_cycle is not None:
+            self.kcode_cycles.append(self._pending_cycle)
+            self._pending_cycle = None
+        if self._open_section is not None:
+            self._open_section['end_offset'] = self.offset
+            self._open_section = None
+
+    def feed(self, raw: bytes) -> None:
+        """
+        Advance the scanner by one line
+
+        Parameters:
+            raw: Line as read from the file in binary mode
+        """
+        self.line_number += 1
+        line_offset = self.offset
+        self.offset += len(raw)
+
+        line = raw.decode('utf-8', errors='ignore')
+        line_lower = line.lower()
+
+        if 'warning' in line_lower:
+            self.warnings.append({
+                'type': 'warning',
+                'message': line.strip(),
+                'line_number': self.line_number
+            })
+        elif 'caution' in line_lower:
+            self.warnings.append({
+                'type': 'caution',
+                'message': line.strip(),
+                'line_number': self.line_number
+            })
+
+        if 'fatal error' in line_lower or 'bad trouble' in line_lower:
+            self.bad_trouble = self.bad_trouble or 'bad trouble' in line_lower
+            self.errors.append({
+                'type': 'fatal',
+                'message': line.strip(),
+                'line_number': self.line_number
+            })
+
+        if 'run terminated when' in line_lower:
+            if not self.terminated:
+                self.terminated = True
+                match = self._TERMINATION.search(line)
+                if match:
+                    self.termination_reason = match.group(1).strip()
+            if self.summary is not None and self.summary['nps'] is None:
+                match = self._HISTORIES.search(line)
+                if match:
+                    self.summary['nps'] = int(match.group(1))
+
+        if line.startswith('1'):
+            # Every page eject ends the previous tally/chart section
+            if self._open_section is not None:
+                self._open_section['end_offset'] = line_offset
+                self._open_section = None
+
+            match = self._TALLY_HEADER.match(line)
+            if match:
+                self._open_section = {
+                    'tally_number': int(match.group(1)),
+                    'nps': int(match.group(2)),
+                    'line_number': self.line_number,
+                    'offset': line_offset,
+                    'end_offset': None,
+                }
+                self.tallies.append(self._open_section)
+            elif line_lower.startswith('1tally fluctuation chart'):
+                self._open_section = {
+                    'line_number': self.line_number,
+                    'offset': line_offset,
+                    'end_offset': None,
+                }
+                self.fluctuation_charts.append(self._open_section)
+            elif line_lower.startswith('1problem summary'):
+                self.summary = {
+                    'line_number': self.line_number,
+                    'offset': line_offset,
+                    'nps': None,
+                    'computer_time_minutes': None,
+                }
+
+        elif 'results of 10 statistical checks' in line_lower:
+            match = self._CHECKS_HEADER.search(line)
+            if match:
+                self.statistical_checks[int(match.group(1))] = {
+                    'line_number': self.line_number,
+                    'offset': line_offset,
+                }
+
+        if self.summary is not None and 'computer time' in line_lower:
+            match = self._COMPUTER_TIME.search(line)
+            if match:
+                self.summary['computer_time_minutes'] = float(match.group(1))
+
+        cycle_match = None
+        if 'cycle' in line_lower:
+            cycle_match = self._CYCLE_LINE.match(line) or self._CYCLE_BLOCK.match(line)
+
+        if self._pending_cycle is not None and cycle_match is None:
+            # A cycle is complete at its source entropy or at the blank line
+            # that ends it; only then is it recorded (and reported)
+            self._update_cycle(line)
+            match = self._ENTROPY.search(line)
+            if match:
+                self._pending_cycle['entropy'] = float(match.group(1))
+            if match or not line.strip():
+                self.kcode_cycles.append(self._pending_cycle)
+                self._pending_cycle = None
+
+        if cycle_match is not None:
+            if self._pending_cycle is not None:
+                self.kcode_cycles.append(self._pending_cycle)
+            self._pending_cycle = {
+                'cycle': int(cycle_match.group(1)),
+                'k_col': None,
+                'k_abs': None,
+                'k_trk': None,
+                'entropy': None,
+                'line_number': self.line_number,
+            }
+            self._update_cycle(line)
+        elif self._cycle_columns is not None:
+            self._feed_cycle_row(line)
+        elif 'cycle' in line_lower and 'k(col' in line_lower:
+            self._cycle_columns = [c.lower() for c in self._COLUMN_NAMES.findall(line)]
+
+        if self.keff is None:
+            if 'final result' in line_lower:
+                self._after_final_result = True
+            match = self._KEFF_FINAL.search(line)
+            if not match and self._after_final_result:
+                match = self._KEFF_PM.search(line)
+            if match:
+                value = float(match.group(1))
+                uncertainty = float(match.group(2))
+                self.keff = {
+                    'keff': value,
+                    'uncertainty': uncertainty,
+                    '95_conf_interval': (value - 1.96*uncertainty,
+                                         value + 1.96*uncertainty)
+                }
+
+    def _update_cycle(self, line: str) -> None:
+        """Record the cycle keff estimates printed on a print table 175 line"""
+        keys = {'col': 'k_col', 'abs': 'k_abs', 'tra': 'k_trk', 'trk': 'k_trk'}
+        for name, value in self._CYCLE_KEFF.findall(line):
+            key = keys[name.lower()[:3]]
+            if self._pending_cycle[key] is None:
+                self._pending_cycle[key] = float(value)
+
+    def _feed_cycle_row(self, line: str) -> None:
+        """Record one row of a KCODE cycle table, or end the table"""
+        tokens = line.split()
+        if not tokens or not tokens[0].isdigit():
+            self._cycle_columns = None
+            return
+        try:
+            values = [float(t) for t in tokens[1:]]
+        except ValueError:
+            self._cycle_columns = None
+            return
+        if len(values) < 3:
+            self._cycle_columns = None
+            return
+
+        cycle = {
+            'cycle': int(tokens[0]),
+            'k_col': values[0],
+            'k_abs': values[1],
+            'k_trk': values[2],
+            'entropy': None,
+            'line_number': self.line_number,
+        }
+        if 'entropy' in self._cycle_columns:
+            column = self._cycle_columns.index('entropy') - 1
+            if 0 <= column < len(values):
+                cycle['entropy'] = values[column]
+        self.kcode_cycles.append(cycle)
+
+    def tally_section(self, tally_num: int) -> Optional[Dict]:
+        """Index entry for the last (final) printout of a tally, or None"""
+        for section in reversed(self.tallies):
+            if section['tally_number'] == tally_num:
+                return section
+        return None
+
+    def termination(self) -> Tuple[bool, str]:
+        """Termination status as (success, message)"""
+        if self.terminated:
+            if self.termination_reason:
+                return True, f"Normal termination: {self.termination_reason}"
+            return True, "Normal termination"
+
+        if any('fatal error' in e['message'].lower() for e in self.errors):
+            return False, "Fatal error encountered"
+
+        if self.bad_trouble:
+            return False, "BAD TROUBLE encountered"
+
+        return False, "Termination status unclear"
+
+
+class OutpWatcher:
+    """
+    Incremental reader for an OUTP file that is still being written
+
+    Keeps the file offset and an OutpScanner between polls, so each poll
+    reads and scans only the bytes appended since the previous one. New
+    KCODE cycles, warnings, fatal errors, tally printouts and termination
+    are reported as events. Change notification uses inotify when the
+    optional inotify_simple package is installed, stat polling otherwise.
 
     Parameters:
         filepath: Path to OUTP file
+        poll_interval: Seconds between checks when polling
 
-    Returns:
-        (success: bool, message: str)
+    Example:
+        for event in OutpWatcher('outp').follow():
+            print(event['event'], event['data'])
     """
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
 
-    # Check for normal termination
-    if 'run terminated when' in content.lower():
-        # Extract termination reason
-        match = re.search(r'run terminated when\s+(.+?)\.', content, re.IGNORECASE)
-        if match:
-            reason = match.group(1).strip()
-            return True, f"Normal termination: {reason}"
-        return True, "Normal termination"
+    # Bytes read per call while catching up on appended output
+    read_size = 1 << 20
+
+    def __init__(self, filepath: str, poll_interval: float = 2.0):
+        self.filepath = filepath
+        self.poll_interval = poll_interval
+        self._reset()
+
+    def _reset(self) -> None:
+        self.scanner = OutpScanner()
+        self.offset = 0
+        self._partial = b''
+        self._seen = {'warnings': 0, 'errors': 0, 'kcode_cycles': 0, 'tallies': 0}
+        self._terminated = False
+
+    def poll(self) -> List[Dict]:
+        """
+        Consume bytes appended since the last poll
+
+        Returns:
+            List of events, each a dictionary with 'event' (one of
+            'kcode_cycle', 'warning', 'fatal_error', 'tally', 'termination')
+            and 'data'
+        """
+        try:
+            size = os.stat(self.filepath).st_size
+        except FileNotFoundError:
+            return []
+
+        if size < self.offset:
+            # File was truncated or replaced: start over
+            self._reset()
+        if size == self.offset:
+            return []
+
+        # Fixed-size reads up to the size seen above; a line split across
+        # reads (or polls) is carried in _partial
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                data = f.read(min(self.read_size, size - self.offset))
+                if not data:
+                    break
+                self.offset += len(data)
+
+                lines = (self._partial + data).split(b'\n')
+                self._partial = lines.pop()
+                for line in lines:
+                    self.scanner.feed(line + b'\n')
+
+        return self._collect_events()
+
+    def _collect_events(self) -> List[Dict]:
+        """Turn scanner state added since the last call into events"""
+        s = self.scanner
+        events = []
+        for attr, name in (('kcode_cycles', 'kcode_cycle'), ('warnings', 'warning'),
+                           ('errors', 'fatal_error'), ('tallies', 'tally')):
+            items = getattr(s, attr)
+            events.extend({'event': name, 'data': item} for item in items[self._seen[attr]:])
+            self._seen[attr] = len(items)
+        events.sort(key=lambda event: event['data']['line_number'])
+
+        if s.terminated and not self._terminated:
+            self._terminated = True
+            success, message = s.termination()
+            events.append({'event': 'termination',
+                           'data': {'success': success, 'message': message}})
+
+        return events
+
+    @property
+    def finished(self) -> bool:
+        """True once normal termination or a fatal error has been seen"""
+        return self._terminated or bool(self.scanner.errors)
+
+    def _waiter(self):
+        """Return a callable that blocks until the file may have changed"""
+        try:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            return lambda: time.sleep(self.poll_interval)
+
+        inotify = INotify()
+        directory = os.path.dirname(os.path.abspath(self.filepath))
+        inotify.add_watch(directory, flags.MODIFY | flags.CREATE | flags.MOVED_TO)
+        return lambda: inotify.read(timeout=int(self.poll_interval * 1000))
+
+    def follow(self, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Yield events as the file grows
+
+        Stops at the first poll without new data once the run has
+        terminated or hit a fatal error, or after timeout seconds without
+        new data.
+
+        Parameters:
+            timeout: Give up after this many idle seconds (None = never)
+        """
+        wait = self._waiter()
+        idle_since = time.monotonic()
+
+        while True:
+            previous = self.offset
+            events = self.poll()
+            for event in events:
+                yield event
+
+            if self.offset != previous:
+                idle_since = time.monotonic()
+            elif self.finished:
+                if self._partial:
+                    self.scanner.feed(self._partial)
+                    self._partial = b''
+                    yield from self._collect_events()
+                return
+            elif timeout is not None and time.monotonic() - idle_since > timeout:
+                return
+
+            wait()
+
+
+_scan_cache = {}
+
+
+def scan_output(filepath: str) -> OutpScanner:
+    """
+    Scan an OUTP file once and cache the result
 
-    # Check for fatal errors
-    if 'fatal error' in content.lower():
-        return False, "Fatal error encountered"
+    The cache is keyed by path, size and modification time, so repeated
+    queries against an unchanged file cost nothing and a rewritten file
+    is rescanned.
 
-    # Check for bad trouble
-    if 'bad trouble' in content.lower():
-        return False, "BAD TROUBLE encountered"
+    Parameters:
+        filepath: Path to OUTP file
 
-    return False, "Termination status unclear"
+    Returns:
+        OutpScanner with the extracted results
+    """
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    scanner = _scan_cache.get(key)
+    if scanner is None:
+        scanner = OutpScanner.scan_file(filepath)
+        _scan_cache.clear()
+        _scan_cache[key] = scanner
+    return scanner
 
 
-def extract_warnings(filepath: str) -> List[Dict[str, str]]:
+def check_termination(filepath: str) -> Tuple[bool, str]:
     """
-    Extract all warning messages from OUTP file
+    Check if MCNP run terminated normally
 
     Parameters:
         filepath: Path to OUTP file
 
     Returns:
-        List of dictionaries with 'type', 'message', 'line_number'
+        (success: bool, message: str)
     """
-    warnings = []
+    return scan_output(filepath).termination()
 
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        for line_num, line in enumerate(f, 1):
-            line_lower = line.lower()
 
-            if 'warning' in line_lower:
-                warnings.append({
-                    'type': 'warning',
-                    'message': line.strip(),
-                    'line_number': line_num
-                })
+def extract_warnings(filepath: str) -> List[Dict[str, str]]:
+    """
+    Extract all warning messages from OUTP file
 
-            elif 'caution' in line_lower:
-                warnings.append({
-                    'type': 'caution',
-                    'message': line.strip(),
-                    'line_number': line_num
-                })
+    Parameters:
+        filepath: Path to OUTP file
 
-    return warnings
+    Returns:
+        List of dictionaries with 'type', 'message', 'line_number'
+    """
+    return list(scan_output(filepath).warnings)
 
 
 def extract_errors(filepath: str) -> List[Dict[str, str]]:
@@ -100,45 +514,177 @@ def extract_errors(filepath: str) -> List[Dict[str, str]]:
     Returns:
         List of dictionaries with 'type', 'message', 'line_number'
     """
-    errors = []
+    return list(scan_output(filepath).errors)
 
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        for line_num, line in enumerate(f, 1):
-            line_lower = line.lower()
 
-            if 'fatal error' in line_lower or 'bad trouble' in line_lower:
-                errors.append({
-                    'type': 'fatal',
-                    'message': line.strip(),
-                    'line_number': line_num
-                })
+def _read_span(filepath: str, start: int, stop: Optional[int]) -> str:
+    """Read the text between two byte offsets of a file"""
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(-1 if stop is None else stop - start)
+    return data.decode('utf-8', errors='ignore')
 
-    return errors
 
+# Tally bin axes in MCTAL storage order (see mctal_basic_parser.BIN_AXES)
+BIN_AXES = ('f', 'd', 'u', 's', 'm', 'c', 'e', 't')
 
-def extract_tally(filepath: str, tally_num: int) -> Optional[Dict]:
+_NUMERIC_START = set('0123456789.+-')
+
+# Blocks printed after the results of a point detector tally
+_DETECTOR_DIAGNOSTICS = ('detector score diagnostics', 'score contributions by',
+                         'score misses', 'average tally per history')
+
+
+def _is_number(token: str) -> bool:
+    """Cheap test for a numeric token (no regex, no float conversion)"""
+    return token[0] in _NUMERIC_START and any(c.isdigit() for c in token)
+
+
+def _bin_label(text: str) -> float:
+    """Numeric label of a bin heading (last number in it), NaN for totals"""
+    for token in reversed(text.replace(',', ' ').split()):
+        if _is_number(token):
+            try:
+                return float(token)
+            except ValueError:
+                continue
+    return np.nan
+
+
+def decode_tally_table(tally_section: str) -> Optional[Dict]:
     """
-    Extract specific tally results
+    Decode the printed results of one tally into binned arrays
+
+    Recognizes region headings (cell/surface/detector), the segment,
+    user bin, angle/cosine bin sub-headings, energy tables and time column
+    headers. Point detectors are named 'detector N <location>', and their
+    uncollided flux sub-tables 'detector N <location> uncollided'; the
+    detector diagnostics that follow the results are not decoded. Every
+    value/error pair is tagged with its bins while the text is walked
+    once; the numbers themselves are converted with a single bulk NumPy
+    call at the end.
 
     Parameters:
-        filepath: Path to OUTP file
-        tally_num: Tally number to extract
+        tally_section: Section text starting at the 1tally line
 
     Returns:
-        Dictionary with tally data or None if not found
+        Dictionary with 'values' and 'errors' of shape
+        (nf, nd, nu, ns, nm, nc, ne, nt) (NaN where a bin combination is
+        not printed), per-axis 'bins' with 'names' and numeric 'labels'
+        (NaN for total bins) like the MCTAL path, and 'shape'; or None if
+        no results table was found
     """
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+    context = dict.fromkeys(BIN_AXES, None)
+    in_energy_table = False
+    time_columns = [None]
+    detectors = []
+    keys = []
+    numbers = []
+
+    for line in tally_section.split('\n')[1:]:
+        tokens = line.split()
+        if not tokens:
+            continue
+        first = tokens[0].lower()
+
+        if (first.startswith('===') or 'statistical checks' in line
+                or line.strip().lower().startswith(_DETECTOR_DIAGNOSTICS)):
+            break
+
+        if first in ('cell', 'surface') and len(tokens) >= 2 and not first.endswith(':'):
+            context.update(f=' '.join(tokens[:2]), u=None, s=None, c=None)
+            in_energy_table = False
+            time_columns = [None]
+        elif first == 'detector':
+            detectors.append(f"detector {len(detectors) + 1} {line.strip()[len('detector'):].strip()}")
+            context.update(f=detectors[-1], u=None, s=None, c=None)
+            in_energy_table = False
+            time_columns = [None]
+        elif first == 'uncollided' and detectors and context['f'] == detectors[-1]:
+            # The uncollided sub-table repeats the location line of the
+            # detector it belongs to
+            detectors.pop()
+            context.update(f=detectors[-1] + ' uncollided' if detectors else None)
+        elif context['f'] is None:
+            continue
+        elif first.startswith('segment'):
+            context.update(s=line.strip(), c=None)
+            in_energy_table = False
+        elif first == 'user' and len(tokens) > 1 and tokens[1].lower().startswith('bin'):
+            context.update(u=line.strip(), c=None)
+            in_energy_table = False
+        elif first in ('angle', 'cosine') and len(tokens) > 1 and tokens[1].lower().startswith('bin'):
+            context.update(c=line.strip())
+            in_energy_table = False
+        elif first.startswith('time'):
+            labels = tokens[1:] if first.endswith(':') else tokens[2:]
+            time_columns = [' '.join(['time', t]) for t in labels] or [None]
+        elif first == 'energy':
+            in_energy_table = True
+        elif first == 'total' or _is_number(tokens[0]):
+            if first == 'total' and not in_energy_table:
+                # Total over the innermost open cosine/segment/user sub-table
+                for axis in ('c', 's', 'u'):
+                    if context[axis] is not None:
+                        context[axis] = 'total'
+                        break
+                energy, pairs = None, tokens[1:]
+            elif first == 'total':
+                energy, pairs = 'energy total', tokens[1:]
+            elif len(tokens) % 2:
+                energy, pairs = 'energy ' + tokens[0], tokens[1:]
+            else:
+                energy, pairs = None, tokens
+            if len(pairs) < 2 or not all(_is_number(t) for t in pairs):
+                continue
+            columns = time_columns if len(pairs) == 2 * len(time_columns) else [None] * (len(pairs) // 2)
+            for column in columns:
+                keys.append((context['f'], None, context['u'], context['s'], None,
+                             context['c'], energy, column))
+            numbers.extend(pairs[:2 * len(columns)])
+
+    if not keys:
+        return None
 
-    # Find tally section
-    tally_pattern = rf'1tally\s+{tally_num}\s+.*?(?=1tally|\Z)'
-    match = re.search(tally_pattern, content, re.DOTALL | re.IGNORECASE)
+    # Unique bins per axis in order of first appearance
+    axes = []
+    for i in range(len(BIN_AXES)):
+        seen = {}
+        for key in keys:
+            seen.setdefault(key[i], len(seen))
+        axes.append(seen)
 
-    if not match:
-        return None
+    shape = tuple(len(axis) for axis in axes)
+    index = tuple(np.array([axis[key[i]] for key in keys]) for i, axis in enumerate(axes))
 
-    tally_section = match.group(0)
+    pairs = np.array(numbers, dtype=np.float64).reshape(-1, 2)
+    values = np.full(shape, np.nan)
+    errors = np.full(shape, np.nan)
+    values[index] = pairs[:, 0]
+    errors[index] = pairs[:, 1]
+
+    bins = {}
+    for name, axis in zip(BIN_AXES, axes):
+        names = [n or '' for n in axis]
+        bins[name] = {
+            'names': names,
+            'labels': np.array([_bin_label(n) if 'total' not in n else np.nan for n in names]),
+        }
+
+    return {'values': values, 'errors': errors, 'bins': bins, 'shape': shape}
+
+
+def _parse_tally_section(tally_num: int, tally_section: str) -> Optional[Dict]:
+    """
+    Decode the text of one 1tally section
+
+    Parameters:
+        tally_num: Tally number
+        tally_section: Section text starting at the 1tally line
 
+    Returns:
+        Dictionary with tally data or None if no results were found
+    """
     result = {
         'tally_number': tally_num,
         'tally_type': None,
@@ -148,30 +694,105 @@ def extract_tally(filepath: str, tally_num: int) -> Optional[Dict]:
         'statistical_checks': None
     }
 
+    header = tally_section[:2000]
+
     # Extract tally type (F1, F2, etc.)
-    type_match = re.search(r'tally\s+(\d+).*?nps.*?(f\d+|\w+)', tally_section, re.IGNORECASE)
+    type_match = re.search(r'tally type\s+(\S+)', header, re.IGNORECASE)
     if type_match:
-        result['tally_type'] = type_match.group(2)
+        result['tally_type'] = type_match.group(1)
 
     # Extract particle type
-    particle_match = re.search(r'particle[s]?:?\s*(\w+)', tally_section, re.IGNORECASE)
+    particle_match = re.search(r'particle(?:\(s\)|s)?:\s*(\w+)|^\s*tally for\s+(\w+)', header,
+                               re.IGNORECASE | re.MULTILINE)
     if particle_match:
-        result['particle_type'] = particle_match.group(1)
-
-    # Extract results table
-    # Look for typical tally result pattern: cell  value  error
-    result_pattern = r'^\s*(\d+)\s+([\d.E+-]+)\s+([\d.E+-]+)'
-    for line in tally_section.split('\n'):
-        match = re.match(result_pattern, line)
-        if match:
-            cell, value, error = match.groups()
-            result['results'].append({
-                'cell': int(cell),
-                'value': float(value),
-                'relative_error': float(error)
-            })
+        result['particle_type'] = particle_match.group(1) or particle_match.group(2)
+
+    table = decode_tally_table(tally_section)
+    if table is None:
+        return None
+    result.update(table)
+
+    # One summary row per region: the last (total) energy/time bin
+    for i, name in enumerate(table['bins']['f']['names']):
+        region = table['values'][i].reshape(-1)
+        error = table['errors'][i].reshape(-1)
+        finite = np.flatnonzero(np.isfinite(region))
+        if finite.size == 0:
+            continue
+        if name.startswith('detector'):
+            label = ' '.join(name.split()[:2]) + (' uncollided' if name.endswith('uncollided') else '')
+        else:
+            label = name.split()[-1]
+        result['cells'].append(label)
+        result['results'].append({
+            'cell': int(label) if label.isdigit() else label,
+            'value': float(region[finite[-1]]),
+            'relative_error': float(error[finite[-1]])
+        })
+
+    return result
 
-    return result if result['results'] else None
+
+def extract_tally(filepath: str, tally_num: int) -> Optional[Dict]:
+    """
+    Extract specific tally results
+
+    Parameters:
+        filepath: Path to OUTP file
+        tally_num: Tally number to extract
+
+    Returns:
+        Dictionary with tally data or None if not found
+    """
+    section = scan_output(filepath).tally_section(tally_num)
+    if section is None:
+        return None
+
+    text = _read_span(filepath, section['offset'], section['end_offset'])
+    return _parse_tally_section(tally_num, text)
+
+
+def extract_all_tallies(filepath: str) -> Dict[int, Dict]:
+    """
+    Extract every tally in one forward pass over the indexed sections
+
+    Parameters:
+        filepath: Path to OUTP file
+
+    Returns:
+        Dictionary mapping tally number to tally data (final printout)
+    """
+    scanner = scan_output(filepath)
+    final = {}
+    for section in scanner.tallies:
+        final[section['tally_number']] = section
+
+    tallies = {}
+    with open(filepath, 'rb') as f:
+        for num, section in sorted(final.items(), key=lambda item: item[1]['offset']):
+            f.seek(section['offset'])
+            stop = section['end_offset']
+            data = f.read(-1 if stop is None else stop - section['offset'])
+            tally = _parse_tally_section(num, data.decode('utf-8', errors='ignore'))
+            if tally:
+                tallies[num] = tally
+
+    return {num: tallies[num] for num in final if num in tallies}
+
+
+# The 10 checks in the order of the "passed?" row of the check table
+STATISTICAL_CHECK_NAMES = [
+    'mean_behavior',
+    'relative_error',
+    'relative_error_decrease',
+    'relative_error_decrease_rate',
+    'vov',
+    'vov_decrease',
+    'vov_decrease_rate',
+    'figure_of_merit',
+    'figure_of_merit_behavior',
+    'pdf_slope'
+]
 
 
 def get_statistical_checks(filepath: str, tally_num: int) -> Optional[Dict]:
@@ -185,80 +806,97 @@ def get_statistical_checks(filepath: str, tally_num: int) -> Optional[Dict]:
     Returns:
         Dictionary with check results (passed/not passed)
     """
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    # Find tally statistical checks section
-    checks_pattern = rf'tally\s+{tally_num}.*?results of 10 statistical checks.*?(?=tally|\Z)'
-    match = re.search(checks_pattern, content, re.DOTALL | re.IGNORECASE)
-
-    if not match:
+    block = scan_output(filepath).statistical_checks.get(tally_num)
+    if block is None:
         return None
 
-    checks_section = match.group(0)
-
     result = {
         'tally_number': tally_num,
         'checks': {}
     }
 
-    # Parse 10 checks
-    check_names = [
-        'mean_behavior',
-        'relative_error',
-        'relative_error_decrease',
-        'relative_error_decrease_rate',
-        'vov',
-        'vov_decrease',
-        'vov_decrease_rate',
-        'figure_of_merit',
-        'figure_of_merit_behavior',
-        'pdf_slope'
-    ]
-
-    # Look for "passed" or "not passed" for each check
-    lines = checks_section.split('\n')
-    for i, check_name in enumerate(check_names, 1):
-        # Pattern: check number followed by status
-        pattern = rf'{i}\s+.*?(passed|not passed|missed)'
-        match = re.search(pattern, checks_section, re.IGNORECASE)
-        if match:
-            result['checks'][check_name] = match.group(1).lower()
+    # The check table is a few lines long; the "passed?" row holds one
+    # yes/no per check
+    with open(filepath, 'rb') as f:
+        f.seek(block['offset'])
+        for _ in range(20):
+            line = f.readline().decode('utf-8', errors='ignore')
+            if not line:
+                break
+            tokens = line.split()
+            if tokens and tokens[0].lower() == 'passed?':
+                for name, status in zip(STATISTICAL_CHECK_NAMES, tokens[1:]):
+                    result['checks'][name] = 'passed' if status.lower() == 'yes' else 'not passed'
+                break
 
     return result if result['checks'] else None
 
 
-def extract_keff(filepath: str) -> Optional[Dict]:
+def get_fluctuation_chart(filepath: str, tally_num: int) -> Optional[Dict[str, np.ndarray]]:
     """
-    Extract keff results from criticality calculation
+    Extract the final tally fluctuation chart for a tally
 
     Parameters:
         filepath: Path to OUTP file
+        tally_num: Tally number
 
     Returns:
-        Dictionary with keff, std dev, and confidence intervals
+        Dictionary of arrays 'nps', 'mean', 'error', 'vov', 'slope', 'fom',
+        or None if the tally has no chart
     """
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+    columns = ['mean', 'error', 'vov', 'slope', 'fom']
+
+    # The last chart holds the final (largest nps) results
+    for chart in reversed(scan_output(filepath).fluctuation_charts):
+        text = _read_span(filepath, chart['offset'], chart['end_offset'])
+        order = None
+        rows = []
+        for line in text.split('\n')[1:]:
+            tokens = line.split()
+            if line.lstrip().startswith('***'):
+                break
+            if not tokens:
+                # A blank line ends the rows of one group of tallies
+                if rows:
+                    break
+                continue
+            if tokens[0] == 'tally':
+                order = [int(x) for x in tokens[1::2]]
+                continue
+            if order is None or tally_num not in order:
+                continue
+            if tokens[0].isdigit() and len(tokens) == 1 + len(columns) * len(order):
+                try:
+                    rows.append([float(t) for t in tokens])
+                except ValueError:
+                    break
+            elif rows:
+                break
+
+        if not rows:
+            continue
+
+        table = np.array(rows)
+        start = 1 + order.index(tally_num) * len(columns)
+        result = {'nps': table[:, 0].astype(np.int64)}
+        for i, name in enumerate(columns):
+            result[name] = table[:, start + i]
+        return result
+
+    return None
 
-    # Look for keff (criticality) section
-    keff_pattern = r'final result.*?keff.*?=\s*([\d.]+)\s*\+\-\s*([\d.]+)'
-    match = re.search(keff_pattern, content, re.DOTALL | re.IGNORECASE)
-
-    if not match:
-        return None
 
-    keff_value = float(match.group(1))
-    keff_uncertainty = float(match.group(2))
+def extract_keff(filepath: str) -> Optional[Dict]:
+    """
+    Extract keff results from criticality calculation
 
-    result = {
-        'keff': keff_value,
-        'uncertainty': keff_uncertainty,
-        '95_conf_interval': (keff_value - 1.96*keff_uncertainty,
-                             keff_value + 1.96*keff_uncertainty)
-    }
+    Parameters:
+        filepath: Path to OUTP file
 
-    return result
+    Returns:
+        Dictionary with keff, std dev, and confidence intervals
+    """
+    return scan_output(filepath).keff
 
 
 def parse_output(filepath: str) -> Dict:
@@ -271,31 +909,38 @@ def parse_output(filepath: str) -> Dict:
     Returns:
         Dictionary with all extracted information
     """
+    scanner = scan_output(filepath)
+    success, message = scanner.termination()
+
     result = {
         'filepath': filepath,
-        'termination': {},
-        'warnings': [],
-        'errors': [],
+        'termination': {
+            'success': success,
+            'message': message
+        },
+        'warnings': list(scanner.warnings),
+        'errors': list(scanner.errors),
         'tallies': defaultdict(dict),
-        'keff': None,
-        'statistics': {}
+        'keff': scanner.keff,
+        'statistics': dict(scanner.summary) if scanner.summary else {}
     }
 
-    # Check termination
-    success, message = check_termination(filepath)
-    result['termination'] = {
-        'success': success,
-        'message': message
-    }
+    # Last printout of each tally holds the final results
+    for section in scanner.tallies:
+        result['tallies'][section['tally_number']] = dict(section)
 
-    # Extract warnings and errors
-    result['warnings'] = extract_warnings(filepath)
-    result['errors'] = extract_errors(filepath)
+    return result
 
-    # Extract keff if present
-    result['keff'] = extract_keff(filepath)
 
-    return result
+def print_tally(tally: Dict) -> None:
+    """Print an extracted tally"""
+    print(f"Tally {tally['tally_number']}:")
+    print(f"  Type: {tally['tally_type']}")
+    print(f"  Particle: {tally['particle_type']}")
+    print(f"  Bins (f,d,u,s,m,c,e,t): {tally['shape']}")
+    print(f"  Results ({len(tally['results'])} cells):")
+    for r in tally['results']:
+        print(f"    Cell {r['cell']}: {r['value']:.6E} ± {r['relative_error']:.4f}")
 
 
 def main():
@@ -317,14 +962,43 @@ def main():
                         help='Extract specific tally number')
     parser.add_argument('--statistical-checks', '-s', type=int, metavar='NUM',
                         help='Get statistical checks for tally number')
+    parser.add_argument('--extract-all-tallies', '-F', action='store_true',
+                        help='Extract every tally in a single pass')
+    parser.add_argument('--fluctuation-chart', '-c', type=int, metavar='NUM',
+                        help='Get tally fluctuation chart for tally number')
     parser.add_argument('--extract-keff', '-k', action='store_true',
                         help='Extract keff from criticality calculation')
     parser.add_argument('--full-parse', '-a', action='store_true',
                         help='Perform full parse (all information)')
+    parser.add_argument('--follow', '-W', action='store_true',
+                        help='Follow a running job and report events as they appear')
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help='Polling interval in seconds for --follow (default: 2)')
 
     args = parser.parse_args()
 
     try:
+        if args.follow:
+            watcher = OutpWatcher(args.outpfile, args.interval)
+            for event in watcher.follow():
+                data = event['data']
+                if event['event'] == 'kcode_cycle':
+                    columns = [f"{label} = {data[key]:.5f}"
+                               for label, key in (('k(col)', 'k_col'), ('k(abs)', 'k_abs'),
+                                                  ('k(trk)', 'k_trk'), ('H', 'entropy'))
+                               if data[key] is not None]
+                    print(f"cycle {data['cycle']:6d}  " + '  '.join(columns))
+                elif event['event'] == 'tally':
+                    print(f"tally {data['tally_number']} printed at nps = {data['nps']}")
+                elif event['event'] == 'termination':
+                    print(f"Termination status: {data['message']}")
+                else:
+                    print(f"Line {data['line_number']}: [{data['type']}] {data['message']}")
+            if watcher.scanner.keff:
+                keff = watcher.scanner.keff
+                print(f"keff = {keff['keff']:.5f} ± {keff['uncertainty']:.5f}")
+            sys.exit(0 if watcher.scanner.terminated else 1)
+
         if args.check_termination:
             success, message = check_termination(args.outpfile)
             print(f"Termination status: {message}")
@@ -348,15 +1022,16 @@ def main():
         elif args.extract_tally:
             tally = extract_tally(args.outpfile, args.extract_tally)
             if tally:
-                print(f"Tally {args.extract_tally}:")
-                print(f"  Type: {tally['tally_type']}")
-                print(f"  Particle: {tally['particle_type']}")
-                print(f"  Results ({len(tally['results'])} cells):")
-                for r in tally['results']:
-                    print(f"    Cell {r['cell']}: {r['value']:.6E} ± {r['relative_error']:.4f}")
+                print_tally(tally)
             else:
                 print(f"Tally {args.extract_tally} not found")
 
+        elif args.extract_all_tallies:
+            tallies = extract_all_tallies(args.outpfile)
+            print(f"Found {len(tallies)} tallies")
+            for tally in tallies.values():
+                print_tally(tally)
+
         elif args.statistical_checks:
             checks = get_statistical_checks(args.outpfile, args.statistical_checks)
             if checks:
@@ -367,6 +1042,17 @@ def main():
             else:
                 print(f"Statistical checks for tally {args.statistical_checks} not found")
 
+        elif args.fluctuation_chart:
+            chart = get_fluctuation_chart(args.outpfile, args.fluctuation_chart)
+            if chart:
+                print(f"Fluctuation chart for tally {args.fluctuation_chart}:")
+                print(f"  {'nps':>12s} {'mean':>12s} {'error':>8s} {'vov':>8s} {'slope':>6s} {'fom':>10s}")
+                for i in range(len(chart['nps'])):
+                    print(f"  {chart['nps'][i]:12d} {chart['mean'][i]:12.4E} {chart['error'][i]:8.4f} "
+                          f"{chart['vov'][i]:8.4f} {chart['slope'][i]:6.1f} {chart['fom'][i]:10.2E}")
+            else:
+                print(f"Fluctuation chart for tally {args.fluctuation_chart} not found")
+
         elif args.extract_keff:
             keff = extract_keff(args.outpfile)
             if keff:
@@ -386,6 +1072,10 @@ def main():
             print(f"Errors: {len(data['errors'])}")
             if data['keff']:
                 print(f"\nkeff: {data['keff']['keff']:.5f} ± {data['keff']['uncertainty']:.5f}")
+            if data['tallies']:
+                print(f"Tallies: {', '.join(map(str, data['tallies']))}")
+            if data['statistics'].get('computer_time_minutes') is not None:
+                print(f"Computer time: {data['statistics']['computer_time_minutes']} minutes")
 
         else:
             parser.print_help()
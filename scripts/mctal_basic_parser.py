@@ -2,8 +2,8 @@
 """
 MCNP MCTAL Basic Parser
 
-Purpose: Basic MCTAL file parsing for data extraction (read-only)
-Note: For advanced processing (merging, export, conversion), see mcnp-mctal-processor skill
+Purpose: Basic MCTAL file parsing for data extraction
+Note: For advanced processing (export, conversion), see mcnp-mctal-processor skill
 
 Usage: See --help for command-line interface
 
@@ -11,55 +11,488 @@ Provides lightweight parsing of MCTAL files for:
 - Header information extraction
 - Tally value/error reading
 - Tally listing
+- Indexed random access to tally blocks (MctalFile)
+- Tally fluctuation charts and KCODE cycle histories as record arrays
+- History-weighted merging of independent (seed-split) runs
 
 Example:
     python mctal_basic_parser.py mctal --list-tallies
     python mctal_basic_parser.py mctal --extract-tally 14
+    python mctal_basic_parser.py mctal --list-tallies --extract-tally 4 14 24
+    python mctal_basic_parser.py mctal --tfc 14 --kcode
+    python mctal_basic_parser.py run*/mctal --merge mctal.merged -o merged.npz
 """
 
 import argparse
+import mmap
 import numpy as np
+import re
 import sys
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
+from mcnp_numeric import combine_moments, decode_floats
 
-def parse_mctal_header(mctal_file: str) -> Dict:
+
+# MCTAL bin dimensions in storage order (f varies slowest, t fastest)
+BIN_AXES = ('f', 'd', 'u', 's', 'm', 'c', 'e', 't')
+
+# Abscissa names used by mcnpvnv.get_tally_from_mctal (MCNPTools order)
+ABSCISSA_IDS = ('facet', 'flag', 'user', 'seg', 'mult', 'cosine', 'energy', 'time')
+
+# Per-cycle KCODE quantities in MCTAL order (MCNPTools MctalKcode naming)
+KCODE_COLUMNS = (
+    'k_col', 'k_abs', 'k_trk',
+    'prompt_life_col', 'prompt_life_abs',
+    'avg_k_col', 'avg_k_col_std',
+    'avg_k_abs', 'avg_k_abs_std',
+    'avg_k_trk', 'avg_k_trk_std',
+    'avg_k_combined', 'avg_k_combined_std',
+    'avg_k_combined_by_cycle', 'avg_k_combined_by_cycle_std',
+    'avg_prompt_life_combined', 'avg_prompt_life_combined_std',
+    'histories', 'fom_combined', 'entropy',
+)
+
+
+def _parse_header_lines(lines: List[str]) -> Dict:
     """
-    Parse MCTAL file header
+    Decode the MCTAL header from its leading lines
 
     Parameters:
-        mctal_file: Path to MCTAL file
+        lines: Header lines (everything before the first tally block)
 
     Returns:
         Dictionary with header information
     """
-    with open(mctal_file, 'r') as f:
-        # Line 1: kod, ver, probid, knod, nps, rnr
-        line1 = f.readline().strip()
-        parts = line1.split()
-
-        header = {
-            'code': parts[0] if len(parts) > 0 else None,
-            'version': parts[1] if len(parts) > 1 else None,
-            'problem_id': ' '.join(parts[2:-3]) if len(parts) > 5 else None,
-            'dump_number': int(parts[-3]) if len(parts) > 2 else None,
-            'nps': int(parts[-2]) if len(parts) > 1 else None,
-            'rnr': int(parts[-1]) if len(parts) > 0 else None,
-        }
+    # Line 1: kod, ver, probid, knod, nps, rnr
+    parts = lines[0].split() if lines else []
+
+    header = {
+        'code': parts[0] if len(parts) > 0 else None,
+        'version': parts[1] if len(parts) > 1 else None,
+        'problem_id': ' '.join(parts[2:-3]) if len(parts) > 5 else None,
+        'dump_number': int(parts[-3]) if len(parts) > 2 else None,
+        'nps': int(parts[-2]) if len(parts) > 1 else None,
+        'rnr': int(parts[-1]) if len(parts) > 0 else None,
+    }
 
-        # Line 2: Comment line (problem title)
-        header['title'] = f.readline().strip()
+    # Line 2: Comment line (problem title)
+    header['title'] = lines[1].strip() if len(lines) > 1 else ''
 
-        # Line 3: ntal, ntally numbers
-        line3 = f.readline().strip().split()
+    # Line 3: "ntal n [npert m]", tally numbers follow on the next line(s)
+    line3 = lines[2].split() if len(lines) > 2 else ['0']
+    if line3[0].lower() == 'ntal':
+        ntal = int(line3[1])
+        header['n_perturbations'] = int(line3[3]) if len(line3) > 3 else 0
+        numbers = [tok for line in lines[3:] for tok in line.split()]
+    else:
         ntal = int(line3[0])
-        tally_numbers = [int(x) for x in line3[1:ntal+1]]
-        header['n_tallies'] = ntal
-        header['tally_numbers'] = tally_numbers
+        numbers = line3[1:]
+
+    header['n_tallies'] = ntal
+    header['tally_numbers'] = [int(x) for x in numbers[:ntal]]
 
     return header
 
 
+class MctalFile:
+    """
+    Indexed, memory-mapped MCTAL reader
+
+    Makes one pass over the file and records the byte offset of every
+    ``tally``, ``vals``, ``tfc`` and ``kcode`` block; only this index stays
+    resident. Tallies are decoded lazily the first time they are accessed,
+    straight from the memory map into preallocated float64 arrays, and the
+    most recently used ones are kept in an LRU cache.
+
+    Parameters:
+        mctal_file: Path to MCTAL file
+        max_cached: Maximum number of decoded tallies kept in memory
+            (None = unlimited, 0 = no caching)
+
+    Example:
+        with MctalFile('mctal', max_cached=4) as mctal:
+            for num in mctal.tally_numbers:
+                data = mctal[num]
+    """
+
+    # Block keywords start in column 1; data lines are indented
+    _KEYWORD_LINE = re.compile(rb'^(tally|vals|tfc|kcode)\b[^\n]*', re.MULTILINE)
+
+    # Bytes of text decoded per step when filling a vals array
+    CHUNK_BYTES = 1 << 22
+
+    def __init__(self, mctal_file: str, max_cached: Optional[int] = 8):
+        self.filename = mctal_file
+        self.max_cached = max_cached
+        self.header = {}
+        self.index = {}
+        self.kcode_offset = None
+        self._cache = OrderedDict()
+        self._fh = open(mctal_file, 'rb')
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._build_index()
+        except Exception:
+            self._fh.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, tally_num: int) -> bool:
+        return tally_num in self.index
+
+    def __getitem__(self, tally_num: int) -> Dict:
+        data = self.read_tally(tally_num)
+        if data is None:
+            raise KeyError(tally_num)
+        return data
+
+    def release(self, tally_num: Optional[int] = None) -> None:
+        """
+        Drop decoded tally arrays from the cache
+
+        Parameters:
+            tally_num: Tally to release (None = all cached tallies)
+        """
+        if tally_num is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(tally_num, None)
+
+    def close(self) -> None:
+        """Release cached tallies and close the memory map and file"""
+        self.release()
+        if not self._mm.closed:
+            self._mm.close()
+        self._fh.close()
+
+    @property
+    def tally_numbers(self) -> List[int]:
+        """Tally numbers in file order"""
+        return list(self.index)
+
+    def _build_index(self) -> None:
+        """Single pass over the memory map recording block offsets"""
+        current = None
+        header_end = None
+
+        for match in self._KEYWORD_LINE.finditer(self._mm):
+            keyword = match.group(1)
+            offset = match.start()
+            if header_end is None and keyword in (b'tally', b'kcode'):
+                header_end = offset
+
+            if keyword == b'tally':
+                if current is not None:
+                    current['end'] = offset
+                num = int(match.group(0).split()[1])
+                current = {'tally': offset, 'vals': None, 'tfc': None,
+                           'end': None}
+                self.index[num] = current
+
+            elif keyword == b'kcode':
+                if current is not None:
+                    current['end'] = offset
+                current = None
+                self.kcode_offset = offset
+
+            elif current is not None:
+                current[keyword.decode()] = offset
+
+        self._size = len(self._mm)
+        if current is not None:
+            current['end'] = self._size
+
+        self.header_end = self._size if header_end is None else header_end
+        head = self._mm[:self.header_end]
+        self.header = _parse_header_lines(head.decode('ascii', errors='ignore').splitlines())
+
+    def _read(self, start: int, stop: int) -> bytes:
+        """Read raw bytes [start, stop) from the file"""
+        return self._mm[start:stop]
+
+    def _line_end(self, start: int) -> int:
+        """Offset just past the line beginning at start"""
+        end = self._mm.find(b'\n', start)
+        return self._size if end < 0 else end + 1
+
+    def _block_stop(self, entry: Dict, key: str) -> int:
+        """Offset where the block starting at entry[key] ends"""
+        order = ['tally', 'vals', 'tfc', 'end']
+        for later in order[order.index(key) + 1:]:
+            if entry[later] is not None:
+                return entry[later]
+        return self._size
+
+    def _parse_tally_header(self, entry: Dict) -> Dict:
+        """
+        Decode the tally line and the f/d/u/s/m/c/e/t bin headers
+
+        Parameters:
+            entry: Index entry for the tally
+
+        Returns:
+            Dictionary with tally metadata and per-axis bin information
+        """
+        text = self._read(entry['tally'], entry['vals'] if entry['vals'] is not None
+                          else self._block_stop(entry, 'tally'))
+        lines = text.decode('ascii', errors='ignore').splitlines()
+
+        tally_line = lines[0].split()
+        info = {
+            'tally_number': int(tally_line[1]),
+            'particle_type': tally_line[2] if len(tally_line) > 2 else None,
+            'detector_type': int(tally_line[3]) if len(tally_line) > 3 else 0,
+            'particles': None,
+            'comment': [],
+            'bins': {},
+        }
+
+        body = lines[1:]
+        if info['particle_type'] is not None and info['particle_type'].startswith('-') and body:
+            info['particles'] = [int(x) for x in body[0].split()]
+            body = body[1:]
+
+        axis = None
+        numbers = {}
+        for line in body:
+            tokens = line.split()
+            if not tokens:
+                continue
+            key = tokens[0]
+            if not line[0].isspace() and key[0] in BIN_AXES and len(key) <= 2:
+                axis = key[0]
+                count = int(tokens[1]) if len(tokens) > 1 else 0
+                info['bins'][axis] = {
+                    'count': count,
+                    'size': max(count, 1),
+                    'kind': {'t': 'total', 'c': 'cumulative'}.get(key[1:], None),
+                    'flag': int(tokens[2]) if len(tokens) > 2 else None,
+                }
+                numbers[axis] = []
+            elif axis is None:
+                info['comment'].append(line.strip())
+            else:
+                numbers[axis].append(line)
+
+        for axis in BIN_AXES:
+            spec = info['bins'].setdefault(axis, {'count': 0, 'size': 1,
+                                                  'kind': None, 'flag': None})
+            listed = decode_floats(' '.join(numbers.get(axis, [])).encode())
+            spec['edges'] = listed
+
+            # Labels have one entry per bin; bins without a listed boundary
+            # (unbounded or total bins) are labelled NaN
+            labels = np.full(spec['size'], np.nan)
+            labels[:min(listed.size, spec['size'])] = listed[:spec['size']]
+            if listed.size == 0 and axis in ('f', 'd'):
+                labels = np.arange(spec['size'], dtype=np.float64)
+            spec['labels'] = labels
+
+        info['shape'] = tuple(info['bins'][axis]['size'] for axis in BIN_AXES)
+        return info
+
+    def _read_tfc_line(self, entry: Dict) -> Optional[Tuple[int, List[int]]]:
+        """Return (number of tfc rows, 1-based tfc bin indices) or None"""
+        if entry['tfc'] is None:
+            return None
+        tokens = self._read(entry['tfc'], self._line_end(entry['tfc'])).split()
+        return int(tokens[1]), [int(x) for x in tokens[2:10]]
+
+    def _decode_vals(self, entry: Dict, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decode a vals block into preallocated value and error arrays
+
+        The block is converted in newline-aligned chunks of CHUNK_BYTES so
+        the text is never copied out of the memory map in one piece.
+        """
+        values = np.empty(n_bins, dtype=np.float64)
+        errors = np.empty(n_bins, dtype=np.float64)
+
+        pos = self._line_end(entry['vals'])
+        stop = self._block_stop(entry, 'vals')
+        filled = 0
+        pending = np.empty(0, dtype=np.float64)
+
+        while pos < stop:
+            chunk_end = min(pos + self.CHUNK_BYTES, stop)
+            if chunk_end < stop:
+                newline = self._mm.rfind(b'\n', pos, chunk_end)
+                chunk_end = newline + 1 if newline > pos else min(self._line_end(chunk_end), stop)
+            nums = decode_floats(self._mm[pos:chunk_end])
+            pos = chunk_end
+
+            if pending.size:
+                nums = np.concatenate((pending, nums))
+            n_pairs = min(nums.size // 2, n_bins - filled)
+            values[filled:filled + n_pairs] = nums[0:2 * n_pairs:2]
+            errors[filled:filled + n_pairs] = nums[1:2 * n_pairs:2]
+            filled += n_pairs
+            pending = nums[2 * n_pairs:]
+
+            if filled == n_bins and pending.size:
+                break
+
+        if filled != n_bins or pending.size:
+            raise ValueError(f"expected {2 * n_bins} numbers in vals block, "
+                             f"found {2 * filled + pending.size}")
+
+        return values, errors
+
+    def read_tally(self, tally_num: int) -> Optional[Dict]:
+        """
+        Decode a tally into full 8-dimensional arrays
+
+        The first access decodes the tally from the memory map; later
+        accesses are served from the LRU cache until the tally is evicted
+        or released.
+
+        Parameters:
+            tally_num: Tally number to extract
+
+        Returns:
+            Dictionary with C-contiguous 'values' and 'errors' of shape
+            (nf, nd, nu, ns, nm, nc, ne, nt), per-axis 'bins' information
+            (count, edges, labels), and the 1-based 'tfc_bin' indices,
+            or None if the tally is not present
+        """
+        if tally_num in self._cache:
+            self._cache.move_to_end(tally_num)
+            return self._cache[tally_num]
+
+        entry = self.index.get(tally_num)
+        if entry is None or entry['vals'] is None:
+            return None
+
+        info = self._parse_tally_header(entry)
+
+        n_bins = int(np.prod(info['shape']))
+        try:
+            values, errors = self._decode_vals(entry, n_bins)
+        except ValueError as e:
+            raise ValueError(f"Tally {tally_num} with bins {info['shape']}: {e}") from None
+
+        info['values'] = values.reshape(info['shape'])
+        info['errors'] = errors.reshape(info['shape'])
+
+        tfc = self._read_tfc_line(entry)
+        info['tfc_bin'] = tfc[1] if tfc else [size for size in info['shape']]
+
+        if self.max_cached is None or self.max_cached > 0:
+            self._cache[tally_num] = info
+            if self.max_cached is not None:
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+
+        return info
+
+    def tfc(self, tally_num: int) -> Optional[np.recarray]:
+        """
+        Tally fluctuation chart for a tally
+
+        Parameters:
+            tally_num: Tally number
+
+        Returns:
+            Record array with one row per dump and fields 'nps', 'mean',
+            'error', 'fom', or None if the tally has no tfc block
+        """
+        entry = self.index.get(tally_num)
+        if entry is None or entry['tfc'] is None:
+            return None
+
+        n_rows, _ = self._read_tfc_line(entry)
+        start = self._line_end(entry['tfc'])
+        nums = decode_floats(self._read(start, self._block_stop(entry, 'tfc')))
+
+        if n_rows == 0 or nums.size == 0:
+            n_cols = 4
+        else:
+            n_cols = nums.size // n_rows
+        table = nums[:n_rows * n_cols].reshape(-1, n_cols)
+
+        names = ['nps', 'mean', 'error', 'fom'] + [f'col_{i}' for i in range(5, n_cols + 1)]
+        columns = [table[:, 0].astype(np.int64)] + [table[:, i] for i in range(1, n_cols)]
+        return np.rec.fromarrays(columns, names=names[:n_cols])
+
+    def kcode_cycles(self) -> Optional[np.recarray]:
+        """
+        Per-cycle KCODE table
+
+        Returns:
+            Record array with one row per recorded cycle: 'cycle' followed
+            by the KCODE_COLUMNS quantities (extra columns written by newer
+            MCNP versions are named col_N), or None if the file has no
+            kcode block. The number of settle (inactive) cycles is
+            available as kcode_settle_cycles.
+        """
+        if self.kcode_offset is None:
+            return None
+
+        tokens = self._read(self.kcode_offset, self._line_end(self.kcode_offset)).split()
+        n_cycles = int(tokens[1])
+        self.kcode_settle_cycles = int(tokens[2]) if len(tokens) > 2 else None
+        n_cols = int(tokens[3]) if len(tokens) > 3 else 19
+
+        nums = decode_floats(self._read(self._line_end(self.kcode_offset), self._size))
+        n_cycles = min(n_cycles, nums.size // n_cols)
+        table = nums[:n_cycles * n_cols].reshape(n_cycles, n_cols)
+
+        names = ['cycle'] + [KCODE_COLUMNS[i] if i < len(KCODE_COLUMNS) else f'col_{i + 1}'
+                             for i in range(n_cols)]
+        columns = [np.arange(1, n_cycles + 1)] + [table[:, i] for i in range(n_cols)]
+        return np.rec.fromarrays(columns, names=names)
+
+    def extract_tally(self, tally_num: int) -> Optional[Dict]:
+        """
+        Extract basic tally data (values and errors only)
+
+        Parameters:
+            tally_num: Tally number to extract
+
+        Returns:
+            Dictionary with flat values, errors, and basic metadata, or None
+            if the tally (or its vals block) is not present
+        """
+        data = self.read_tally(tally_num)
+        if data is None:
+            return None
+
+        return {
+            'tally_number': tally_num,
+            'particle_type': data['particle_type'],
+            'values': data['values'].ravel(),
+            'errors': data['errors'].ravel(),
+        }
+
+
+def parse_mctal_header(mctal_file: str) -> Dict:
+    """
+    Parse MCTAL file header
+
+    Parameters:
+        mctal_file: Path to MCTAL file
+
+    Returns:
+        Dictionary with header information
+    """
+    lines = []
+    with open(mctal_file, 'r') as f:
+        for line in f:
+            if line.startswith(('tally', 'kcode')):
+                break
+            lines.append(line)
+
+    return _parse_header_lines(lines)
+
+
 def list_tallies(mctal_file: str) -> List[int]:
     """
     List all tally numbers in MCTAL file
@@ -84,147 +517,365 @@ def extract_tally_basic(mctal_file: str, tally_num: int) -> Optional[Dict]:
 
     Returns:
         Dictionary with values, errors, and basic metadata
+
+    Note:
+        Builds a throwaway index; use MctalFile directly when extracting
+        more than one tally from the same file.
     """
-    with open(mctal_file, 'r') as f:
-        content = f.read()
-
-    # Find tally section
-    # MCTAL format: "tally N" line starts each tally
-    tally_marker = f"tally {tally_num:8d}"
-    if tally_marker not in content:
-        # Try without padding
-        tally_marker = f"tally {tally_num}"
-        if tally_marker not in content:
-            return None
+    with MctalFile(mctal_file) as mctal:
+        return mctal.extract_tally(tally_num)
 
-    # Split into lines and find tally start
-    lines = content.split('\n')
-    tally_start = None
-    for i, line in enumerate(lines):
-        if f"tally" in line.lower() and str(tally_num) in line:
-            tally_start = i
-            break
-
-    if tally_start is None:
-        return None
-
-    # Parse tally header line
-    # Format: tally  n  particle_type
-    tally_line = lines[tally_start].split()
-    result = {
-        'tally_number': tally_num,
-        'particle_type': tally_line[2] if len(tally_line) > 2 else None,
-    }
 
-    # Next line typically has tally comment/type
-    # Then f, d, u, s, m, c, e, t bins
+def read_tally(mctal_file: str, tally_num: int) -> Optional[Dict]:
+    """
+    Decode a tally into full 8-dimensional arrays
+
+    Parameters:
+        mctal_file: Path to MCTAL file
+        tally_num: Tally number to extract
 
-    # Find "vals" section - this marks start of data
-    vals_start = None
-    for i in range(tally_start, min(tally_start + 100, len(lines))):
-        if 'vals' in lines[i].lower():
-            vals_start = i + 1
-            break
+    Returns:
+        Dictionary from MctalFile.read_tally
+    """
+    with MctalFile(mctal_file) as mctal:
+        return mctal.read_tally(tally_num)
 
-    if vals_start is None:
-        return None
 
-    # Read values and errors
-    # MCTAL format: alternating value, error on same or consecutive lines
-    values = []
-    errors = []
+def get_tally_from_mctal(mctal_file: str, tally_id: int, abscissa_id=None):
+    """
+    Return mctal tally bins, values, and standard deviations
 
-    for i in range(vals_start, len(lines)):
-        line = lines[i].strip()
+    Drop-in replacement for mcnpvnv.get_tally_from_mctal that needs no
+    MCNPTools installation and decodes the whole tally in one bulk read.
 
-        # Check if we've hit next tally or end
-        if 'tally' in line.lower() or not line:
-            if len(values) > 10:  # Likely finished reading data
-                break
-            continue
+    Parameters:
+        mctal_file: Path to MCTAL file
+        tally_id: Tally number
+        abscissa_id: None for the tfc bin only, one name from ABSCISSA_IDS
+            for a 1-D slice through the tfc bin, or the full ABSCISSA_IDS
+            tuple for all bins
 
-        # Parse numbers
-        parts = line.split()
-        if parts:
-            try:
-                nums = [float(x) for x in parts]
-                # MCTAL typically has value, error pairs
-                for j in range(0, len(nums), 2):
-                    if j + 1 < len(nums):
-                        values.append(nums[j])
-                        errors.append(nums[j+1])
-                    else:
-                        values.append(nums[j])
-            except ValueError:
-                continue
+    Returns:
+        (bins, vals, errs) with the same layout as the MCNPTools version
+    """
+    data = read_tally(mctal_file, tally_id)
+    if data is None:
+        raise ValueError(f"Either mctal_file {mctal_file} or tally_id {tally_id} does not exist")
+
+    tfc = tuple(i - 1 for i in data['tfc_bin'])
+
+    if abscissa_id is None:
+        return None, [data['values'][tfc]], [data['errors'][tfc]]
 
-    result['values'] = np.array(values)
-    result['errors'] = np.array(errors) if errors else None
+    if isinstance(abscissa_id, str):
+        if abscissa_id not in ABSCISSA_IDS:
+            raise ValueError(f"{abscissa_id} abscissa_id not in {ABSCISSA_IDS}")
+        pos = ABSCISSA_IDS.index(abscissa_id)
+        index = list(tfc)
+        index[pos] = slice(None)
+        bins = list(data['bins'][BIN_AXES[pos]]['labels'])
+        return bins, list(data['values'][tuple(index)]), list(data['errors'][tuple(index)])
 
-    return result
+    if isinstance(abscissa_id, tuple):
+        if abscissa_id != ABSCISSA_IDS:
+            raise ValueError("Subselected abscissae with tuple not yet supported")
+        bins = [list(data['bins'][axis]['labels']) for axis in BIN_AXES]
+        return bins, data['values'], data['errors']
+
+    raise ValueError(f"{abscissa_id} is not a string or tuple of strings")
+
+
+def get_keff_from_mctal(mctal_file: str) -> Tuple[float, float]:
+    """
+    Return mctal cumulative col/abs/trk-len keff value and standard deviation
+
+    Drop-in replacement for mcnpvnv.get_keff_from_mctal without MCNPTools.
+
+    Parameters:
+        mctal_file: Path to MCTAL file
+
+    Returns:
+        (keff, standard deviation) from the last recorded cycle
+    """
+    with MctalFile(mctal_file) as mctal:
+        cycles = mctal.kcode_cycles()
+    if cycles is None or len(cycles) == 0:
+        raise ValueError(f"No kcode data in {mctal_file}")
+
+    return float(cycles.avg_k_combined[-1]), float(cycles.avg_k_combined_std[-1])
+
+
+def _write_npz_member(zf: zipfile.ZipFile, name: str, array: np.ndarray) -> None:
+    """Append one array to an open NPZ archive without holding the others"""
+    with zf.open(f"{name}.npy", 'w', force_zip64=True) as fh:
+        np.lib.format.write_array(fh, np.asanyarray(array), allow_pickle=False)
+
+
+def merge_mctals(mctal_files: List[str], output: Optional[str] = None,
+                 npz_output: Optional[str] = None,
+                 max_workers: Optional[int] = None) -> Dict:
+    """
+    Merge MCTAL files from independent runs (different RAND SEEDs)
+
+    Tallies are processed one at a time: the files are indexed and each
+    tally is decoded from all of them concurrently on a thread pool, then
+    combined with history weighting (see combine_moments) and written
+    out before the next tally is read. At most one tally's arrays per file
+    are resident at any time.
+
+    Parameters:
+        mctal_files: Paths to MCTAL files with identical tally layouts
+        output: Path for the merged MCTAL file (optional)
+        npz_output: Path for an NPZ with tally{N}_values/errors (optional)
+        max_workers: Thread pool size (default: one per file, up to 32)
+
+    Returns:
+        Dictionary with 'nps' (combined histories), 'n_files' and
+        'tally_numbers'
+
+    Note:
+        The merged file keeps the bin headers of the first file and a
+        single-row tally fluctuation chart; KCODE cycle tables are not
+        additive across independent runs and are not written.
+    """
+    if len(mctal_files) < 2:
+        raise ValueError("At least two MCTAL files are required for merging")
+
+    workers = max_workers or min(32, len(mctal_files))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        mctals = list(pool.map(lambda path: MctalFile(path, max_cached=0), mctal_files))
+        try:
+            first = mctals[0]
+            for other in mctals[1:]:
+                if other.tally_numbers != first.tally_numbers:
+                    raise ValueError(f"Tally numbers in {other.filename} "
+                                     f"do not match {first.filename}")
+
+            nps = np.array([m.header['nps'] for m in mctals], dtype=np.float64)
+            total_nps = int(nps.sum())
+
+            out = open(output, 'wb') if output else None
+            zf = zipfile.ZipFile(npz_output, 'w', allowZip64=True) if npz_output else None
+            try:
+                if out:
+                    h = first.header
+                    rnr = sum(m.header['rnr'] or 0 for m in mctals)
+                    out.write(f"{h['code'] or '':<8s}{h['version'] or '':<8s}"
+                              f"{h['problem_id'] or '':<19s}{h['dump_number'] or 0:5d}"
+                              f"{total_nps:11d}{rnr:15d}\n".encode())
+                    out.write(first._read(first._line_end(0), first.header_end))
+
+                for num in first.tally_numbers:
+                    tallies = list(pool.map(lambda m: m.read_tally(num), mctals))
+                    shape = tallies[0]['shape']
+                    for m, t in zip(mctals, tallies):
+                        if t['shape'] != shape:
+                            raise ValueError(f"Tally {num} in {m.filename} has bins "
+                                             f"{t['shape']}, expected {shape}")
+
+                    mean, rel = combine_moments(nps, [t['values'] for t in tallies],
+                                                 [t['errors'] for t in tallies])
+                    charts = [m.tfc(num) for m in mctals]
+                    tfc_bin = tuple(i - 1 for i in tallies[0]['tfc_bin'])
+                    del tallies
+
+                    if out:
+                        entry = first.index[num]
+                        out.write(first._read(entry['tally'], entry['vals']))
+                        out.write(b"vals\n")
+                        pairs = np.column_stack((mean.ravel(), rel.ravel()))
+                        n_full = pairs.shape[0] // 4 * 4
+                        if n_full:
+                            np.savetxt(out, pairs[:n_full].reshape(-1, 8),
+                                       fmt=['%13.5E', '%7.4f'] * 4, delimiter='')
+                        if n_full < pairs.shape[0]:
+                            np.savetxt(out, pairs[n_full:].reshape(1, -1),
+                                       fmt=['%13.5E', '%7.4f'] * (pairs.shape[0] - n_full),
+                                       delimiter='')
+
+                        if entry['tfc'] is not None:
+                            # Combined FOM from the summed run times T_i = 1/(R_i^2 FOM_i)
+                            run_time = 0.0
+                            for chart in charts:
+                                if chart is not None and len(chart) and chart['fom'][-1] > 0:
+                                    run_time += 1.0 / (chart['error'][-1] ** 2 * chart['fom'][-1])
+                            r = rel[tfc_bin]
+                            fom = 1.0 / (r * r * run_time) if r > 0 and run_time > 0 else 0.0
+                            jtf = first._read(entry['tfc'], first._line_end(entry['tfc'])).split()[2:]
+                            out.write(f"tfc {1:5d}".encode()
+                                      + b''.join(b'%8s' % tok for tok in jtf) + b"\n")
+                            out.write(f"{total_nps:11d}{mean[tfc_bin]:13.5E}"
+                                      f"{r:13.5E}{fom:13.5E}\n".encode())
+
+                    if zf:
+                        _write_npz_member(zf, f"tally{num}_values", mean)
+                        _write_npz_member(zf, f"tally{num}_errors", rel)
+            finally:
+                if out:
+                    out.close()
+                if zf:
+                    zf.close()
+        finally:
+            for m in mctals:
+                m.close()
+
+    return {'nps': total_nps, 'n_files': len(mctal_files),
+            'tally_numbers': first.tally_numbers}
+
+
+def print_tally(data: Dict) -> None:
+    """Print a short summary of an extracted tally"""
+    values = np.ravel(data['values'])
+    errors = np.ravel(data['errors']) if data['errors'] is not None else None
+
+    print(f"\nTally {data['tally_number']}:")
+    print(f"  Particle type: {data['particle_type']}")
+    print(f"  Number of bins: {values.size}")
+    if 'shape' in data:
+        print(f"  Bins (f,d,u,s,m,c,e,t): {data['shape']}")
+    print(f"  Value range: [{np.min(values):.6E}, {np.max(values):.6E}]")
+    if errors is not None:
+        print(f"  Error range: [{np.min(errors):.6E}, {np.max(errors):.6E}]")
+
+        # Print first few values
+        print(f"\n  First 5 bins:")
+        for i in range(min(5, values.size)):
+            print(f"    {i+1}: {values[i]:.6E} ± {errors[i]:.6E}")
+
+
+def _tally_arrays(data: Dict) -> Dict[str, np.ndarray]:
+    """Flatten a read_tally result into NPZ-friendly arrays"""
+    arrays = {
+        'tally_number': data['tally_number'],
+        'particle_type': data['particle_type'],
+        'values': data['values'],
+        'errors': data['errors'],
+        'tfc_bin': np.asarray(data['tfc_bin']),
+    }
+    for axis in BIN_AXES:
+        arrays[f'bins_{axis}'] = data['bins'][axis]['labels']
+    return arrays
 
 
 def main():
     """Command-line interface"""
     parser = argparse.ArgumentParser(
         description="Basic MCTAL file parser for data extraction",
-        epilog="For advanced MCTAL processing (merging, export), see mcnp-mctal-processor skill",
+        epilog="For advanced MCTAL processing (export, conversion), see mcnp-mctal-processor skill",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument('mctal_file', help='MCTAL file to parse')
-
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--list-tallies', '-l', action='store_true',
-                       help='List all tally numbers')
-    group.add_argument('--extract-tally', '-t', type=int, metavar='NUM',
-                       help='Extract tally number NUM')
-    group.add_argument('--header', '-H', action='store_true',
-                       help='Parse and display header information')
+    parser.add_argument('mctal_file', nargs='+',
+                        help='MCTAL file to parse (several files with --merge)')
+
+    parser.add_argument('--list-tallies', '-l', action='store_true',
+                        help='List all tally numbers')
+    parser.add_argument('--extract-tally', '-t', type=int, metavar='NUM', nargs='+',
+                        help='Extract tally number(s) NUM (batch mode reuses one index)')
+    parser.add_argument('--all-tallies', '-a', action='store_true',
+                        help='Extract every tally in the file')
+    parser.add_argument('--header', '-H', action='store_true',
+                        help='Parse and display header information')
+    parser.add_argument('--tfc', type=int, metavar='NUM',
+                        help='Print tally fluctuation chart for tally NUM')
+    parser.add_argument('--kcode', '-k', action='store_true',
+                        help='Print KCODE cycle history summary')
+    parser.add_argument('--merge', '-M', metavar='OUT',
+                        help='Merge all input MCTAL files into OUT (NPZ copy via --output)')
+    parser.add_argument('--workers', '-j', type=int,
+                        help='Threads used for --merge (default: one per file)')
 
     parser.add_argument('--output', '-o', help='Output file (NPZ format for arrays)')
 
     args = parser.parse_args()
 
+    if args.merge:
+        try:
+            summary = merge_mctals(args.mctal_file, args.merge, args.output, args.workers)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nMerged {summary['n_files']} files ({summary['nps']} histories, "
+              f"{len(summary['tally_numbers'])} tallies) into {args.merge}")
+        if args.output:
+            print(f"Saved arrays to {args.output}")
+        return
+
+    if len(args.mctal_file) != 1:
+        parser.error('multiple MCTAL files are only accepted with --merge')
+    args.mctal_file = args.mctal_file[0]
+
+    if not (args.list_tallies or args.extract_tally or args.all_tallies or args.header
+            or args.tfc is not None or args.kcode):
+        parser.error('one of --list-tallies, --extract-tally, --all-tallies, --header, '
+                     '--tfc, --kcode, --merge is required')
+
     try:
-        if args.list_tallies:
-            tallies = list_tallies(args.mctal_file)
-            print(f"\nTallies in {args.mctal_file}:")
-            print(f"  Total: {len(tallies)}")
-            print(f"  Numbers: {', '.join(map(str, tallies))}")
-
-        elif args.header:
-            header = parse_mctal_header(args.mctal_file)
-            print(f"\nMCTAL Header Information:")
-            print(f"  Code: {header['code']}")
-            print(f"  Version: {header['version']}")
-            print(f"  Title: {header['title']}")
-            print(f"  Dump: {header['dump_number']}")
-            print(f"  NPS: {header['nps']}")
-            print(f"  Random number: {header['rnr']}")
-            print(f"  Number of tallies: {header['n_tallies']}")
-            print(f"  Tally numbers: {', '.join(map(str, header['tally_numbers']))}")
-
-        elif args.extract_tally:
-            data = extract_tally_basic(args.mctal_file, args.extract_tally)
-            if data:
-                print(f"\nTally {args.extract_tally}:")
-                print(f"  Particle type: {data['particle_type']}")
-                print(f"  Number of bins: {len(data['values'])}")
-                print(f"  Value range: [{np.min(data['values']):.6E}, {np.max(data['values']):.6E}]")
-                if data['errors'] is not None:
-                    print(f"  Error range: [{np.min(data['errors']):.6E}, {np.max(data['errors']):.6E}]")
-
-                    # Print first few values
-                    print(f"\n  First 5 bins:")
-                    for i in range(min(5, len(data['values']))):
-                        print(f"    {i+1}: {data['values'][i]:.6E} ± {data['errors'][i]:.6E}")
-
-                if args.output:
-                    np.savez(args.output, **data)
-                    print(f"\nSaved to {args.output}")
-            else:
-                print(f"Tally {args.extract_tally} not found")
+        with MctalFile(args.mctal_file) as mctal:
+            if args.header:
+                header = mctal.header
+                print(f"\nMCTAL Header Information:")
+                print(f"  Code: {header['code']}")
+                print(f"  Version: {header['version']}")
+                print(f"  Title: {header['title']}")
+                print(f"  Dump: {header['dump_number']}")
+                print(f"  NPS: {header['nps']}")
+                print(f"  Random number: {header['rnr']}")
+                print(f"  Number of tallies: {header['n_tallies']}")
+                print(f"  Tally numbers: {', '.join(map(str, header['tally_numbers']))}")
+
+            if args.list_tallies:
+                tallies = mctal.tally_numbers
+                print(f"\nTallies in {args.mctal_file}:")
+                print(f"  Total: {len(tallies)}")
+                print(f"  Numbers: {', '.join(map(str, tallies))}")
+
+            if args.tfc is not None:
+                chart = mctal.tfc(args.tfc)
+                if chart is None:
+                    print(f"No tally fluctuation chart for tally {args.tfc}")
+                else:
+                    print(f"\nTally fluctuation chart for tally {args.tfc}:")
+                    print(f"  {'nps':>14s} {'mean':>13s} {'error':>8s} {'fom':>11s}")
+                    for row in chart:
+                        print(f"  {row['nps']:14d} {row['mean']:13.5E} {row['error']:8.4f} "
+                              f"{row['fom']:11.4E}")
+
+            if args.kcode:
+                cycles = mctal.kcode_cycles()
+                if cycles is None or len(cycles) == 0:
+                    print("No kcode data found (not a criticality calculation?)")
+                else:
+                    active = cycles[cycles.cycle > (mctal.kcode_settle_cycles or 0)]
+                    print(f"\nKCODE cycles: {len(cycles)} "
+                          f"({mctal.kcode_settle_cycles} settle, {len(active)} active)")
+                    print(f"  Final keff: {cycles.avg_k_combined[-1]:.5f} "
+                          f"± {cycles.avg_k_combined_std[-1]:.5f}")
+                    if len(active):
+                        print(f"  Active k(col) range: [{active.k_col.min():.5f}, "
+                              f"{active.k_col.max():.5f}]")
+                    if 'entropy' in cycles.dtype.names:
+                        print(f"  Shannon entropy (last cycle): {cycles.entropy[-1]:.5f}")
+
+            requested = mctal.tally_numbers if args.all_tallies else (args.extract_tally or [])
+            extracted = {}
+            for num in requested:
+                data = mctal.read_tally(num)
+                if data:
+                    print_tally(data)
+                    extracted[num] = _tally_arrays(data)
+                else:
+                    print(f"Tally {num} not found")
+
+            if args.output and extracted:
+                if len(requested) == 1:
+                    np.savez(args.output, **extracted[requested[0]])
+                else:
+                    np.savez(args.output, **{f"tally{num}_{key}": value
+                                             for num, data in extracted.items()
+                                             for key, value in data.items()
+                                             if value is not None})
+                print(f"\nSaved to {args.output}")
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)